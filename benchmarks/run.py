@@ -0,0 +1,286 @@
+"""Benchmark setup, options flow and updates against the stand-in API.
+
+For every contract count a config entry is created through the config flow
+and reloaded with that many tracked contracts, then one contract is added
+through the options flow and a number of coordinator updates are run.
+Reported per run:
+
+- setup: wall time of the reload until the first price refresh finished,
+  the requests it sent and the peak Python memory it allocated
+- options flow: wall time and requests of adding one contract until its
+  prices were fetched
+- update: mean wall and CPU time of a coordinator refresh
+
+CPU time is the CPU of the Home Assistant process, the stand-in API runs in
+a separate process. Run from the repository root:
+
+    python -m benchmarks.run --sizes 1 10 50 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import random
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import aiohttp
+
+from benchmarks.server import build_catalog, serve
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from homeassistant import bootstrap, config_entries, loader  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components import sec_api  # noqa: E402
+from custom_components.sec_api import coordinator as sec_coordinator  # noqa: E402
+from custom_components.sec_api.const import DOMAIN  # noqa: E402
+from custom_components.sec_api.storage import async_get_sensor_store  # noqa: E402
+
+# Only what the integration needs, the frontend is not set up
+CONFIGURATION = {"homeassistant": {"time_zone": "UTC"}, "recorder": {}}
+REFRESH_TIMEOUT = 120  # In seconds
+
+
+def _free_port() -> int:
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _async_stats(server_url: str, reset: bool = False) -> dict:
+    """Return the requests counted by the stand-in API."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            f"{server_url}/_stats", params={"reset": "1"} if reset else None
+        ) as response:
+            return await response.json()
+
+
+async def _async_wait_for_server(server_url: str) -> None:
+    """Wait until the stand-in API answers."""
+    for _ in range(100):
+        try:
+            await _async_stats(server_url)
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.1)
+        else:
+            return
+    raise RuntimeError("Stand-in API did not start")
+
+
+async def _async_wait_for_refresh(hass: HomeAssistant, entry_id: str):
+    """Wait for the first price refresh of a (re)loaded entry."""
+    deadline = time.monotonic() + REFRESH_TIMEOUT
+    while time.monotonic() < deadline:
+        data = hass.data.get(DOMAIN, {}).get(entry_id)
+        if data is not None and data.coordinator.startup_duration is not None:
+            return data
+        await asyncio.sleep(0.01)
+    raise TimeoutError("First price refresh did not finish")
+
+
+async def _async_wait_for_prices(hass: HomeAssistant, entry_id: str, contract_id: int):
+    """Wait until the prices of a contract have been fetched."""
+    deadline = time.monotonic() + REFRESH_TIMEOUT
+    while time.monotonic() < deadline:
+        coordinator = hass.data[DOMAIN][entry_id].coordinator
+        if contract_id in (coordinator.data or {}):
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError("Prices of the added contract were not fetched")
+
+
+async def _async_create_entry(hass: HomeAssistant) -> config_entries.ConfigEntry:
+    """Create a config entry through the config flow."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"api_key": "benchmark", "zip_code": "2060"}
+    )
+    await hass.async_block_till_done()
+    return result["result"]
+
+
+async def _async_add_contract(hass: HomeAssistant, entry_id: str, row: dict) -> None:
+    """Add a contract through every step of the options flow."""
+    flow = hass.config_entries.options
+    result = await flow.async_init(entry_id)
+    for user_input in (
+        {"action": "Add contract"},
+        {
+            "energy_type": row["energietype"],
+            "vast_variabel_dynamisch": row["vast_variabel_dynamisch"],
+            "segment": row["segment"],
+        },
+        {"selected_supplier": row["handelsnaam"]},
+        {"selected_contract": row["productnaam"]},
+        {"selected_price_component": row["prijsonderdeel"]},
+    ):
+        result = await flow.async_configure(result["flow_id"], user_input)
+    await hass.async_block_till_done()
+
+
+def _requests(stats: dict) -> int:
+    """Return the total number of requests in a /_stats answer."""
+    return sum(stats["requests"].values())
+
+
+async def _async_reload(hass: HomeAssistant, entry_id: str) -> None:
+    """Reload an entry and wait for its first price refresh."""
+    await hass.config_entries.async_reload(entry_id)
+    await _async_wait_for_refresh(hass, entry_id)
+
+
+async def _async_run_size(
+    hass: HomeAssistant, server_url: str, rows: list[dict], size: int, updates: int
+) -> dict:
+    """Benchmark one contract count."""
+    sample = random.Random(size).sample(rows, size + 1)
+    tracked, added = sample[:size], sample[size]
+
+    entry = await _async_create_entry(hass)
+    await _async_wait_for_refresh(hass, entry.entry_id)
+    store = await async_get_sensor_store(hass)
+    for row in tracked:
+        store.async_add_sensor(entry.entry_id, f"{DOMAIN}_benchmark_{row['id']}", row)
+
+    await _async_stats(server_url, reset=True)
+    started = time.perf_counter()
+    await _async_reload(hass, entry.entry_id)
+    setup_time = time.perf_counter() - started
+    setup_stats = await _async_stats(server_url, reset=True)
+
+    # Measured separately, tracing allocations slows everything down
+    tracemalloc.start()
+    await _async_reload(hass, entry.entry_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await _async_stats(server_url, reset=True)
+    started = time.perf_counter()
+    await _async_add_contract(hass, entry.entry_id, added)
+    await _async_wait_for_prices(hass, entry.entry_id, added["id"])
+    flow_time = time.perf_counter() - started
+    flow_stats = await _async_stats(server_url, reset=True)
+
+    coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+    wall = cpu = 0.0
+    for _ in range(updates):
+        started, started_cpu = time.perf_counter(), time.process_time()
+        await coordinator.async_refresh()
+        wall += time.perf_counter() - started
+        cpu += time.process_time() - started_cpu
+    update_stats = await _async_stats(server_url, reset=True)
+
+    result = {
+        "contracts": size,
+        "tracked": len(coordinator.contracts),
+        "setup_s": round(setup_time, 3),
+        "setup_requests": _requests(setup_stats),
+        "setup_bytes": setup_stats["bytes"],
+        "setup_peak_mb": round(peak / 2**20, 1),
+        "options_flow_s": round(flow_time, 3),
+        "options_flow_requests": _requests(flow_stats),
+        "update_wall_ms": round(wall / updates * 1000, 1),
+        "update_cpu_ms": round(cpu / updates * 1000, 1),
+        "update_requests": _requests(update_stats) / updates,
+    }
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    return result
+
+
+async def async_run(args: argparse.Namespace, server_url: str) -> list[dict]:
+    """Start Home Assistant and benchmark every contract count."""
+    sec_api.API_BASE_URL = f"{server_url}/data"
+    sec_coordinator.STARTUP_JITTER = args.jitter
+
+    rows = [
+        row
+        for row in build_catalog(args.suppliers)
+        if row["energietype"] == "Elektriciteit"
+    ]
+    with tempfile.TemporaryDirectory() as config_dir:
+        os.symlink(REPO / "custom_components", Path(config_dir) / "custom_components")
+        hass = HomeAssistant(config_dir)
+        hass.config.skip_pip = True
+        loader.async_setup(hass)
+        if await bootstrap.async_from_config_dict(CONFIGURATION, hass) is None:
+            raise RuntimeError("Home Assistant failed to start")
+        await hass.async_start()
+        try:
+            results = []
+            for size in args.sizes:
+                results.append(
+                    await _async_run_size(hass, server_url, rows, size, args.updates)
+                )
+                print(json.dumps(results[-1]), flush=True)
+        finally:
+            await hass.async_stop()
+    return results
+
+
+def _print_table(results: list[dict]) -> None:
+    """Print the results as an aligned table."""
+    columns = list(results[0])
+    widths = [
+        max(len(column), *(len(str(result[column])) for result in results))
+        for column in columns
+    ]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print(
+            "  ".join(
+                str(result[column]).rjust(width)
+                for column, width in zip(columns, widths)
+            )
+        )
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--suppliers", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=5)
+    parser.add_argument(
+        "--jitter", type=float, default=0, help="startup jitter in seconds"
+    )
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    port = _free_port()
+    server_url = f"http://127.0.0.1:{port}"
+    server = multiprocessing.Process(
+        target=serve, args=(port, args.suppliers), daemon=True
+    )
+    server.start()
+    try:
+        asyncio.run(_async_wait_for_server(server_url))
+        results = asyncio.run(async_run(args, server_url))
+    finally:
+        server.terminate()
+        server.join()
+
+    _print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
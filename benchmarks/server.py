@@ -0,0 +1,226 @@
+"""Stand-in for the Smart Energy Control API with a synthetic V-test catalog.
+
+Serves /data, /month and /constants the way the integration uses them,
+including show_prices, interval, ETag revalidation and the filters of the
+options flow. Price slots are in UTC. Requests per endpoint are available
+on /_stats.
+
+Run on its own with ``python -m benchmarks.server --port 8123``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import json
+import math
+
+from aiohttp import web
+
+ENERGY_TYPES = ("Elektriciteit", "Gas")
+CONTRACT_TYPES = ("Vast", "Variabel", "Dynamisch")
+SEGMENTS = ("Woning", "Onderneming")
+PRICE_COMPONENTS = {
+    "Elektriciteit": (
+        "Enkelvoudig",
+        "Tweevoudig dag",
+        "Tweevoudig nacht",
+        "Exclusief nacht",
+    ),
+    "Gas": ("Enkelvoudig",),
+}
+PRODUCTS_PER_SUPPLIER = 3
+FILTERS = (
+    "energietype",
+    "vast_variabel_dynamisch",
+    "segment",
+    "handelsnaam",
+    "productnaam",
+    "prijsonderdeel",
+)
+CONSTANTS = {
+    "bijz_accijns": 0.04748,
+    "bijdrage_energie": 0.002042,
+    "aansluitingsvergoeding": 0.00075,
+    "nettarief": 0.0612,
+    "gsc": 0.0114,
+    "wkk": 0.004,
+    "btw": 0.06,
+    "capaciteitstarief": 53.2,
+    "databeheer": 18.5,
+}
+
+
+def build_catalog(suppliers: int) -> list[dict]:
+    """Return the price component rows of a V-test sized catalog."""
+    rows = []
+    for energietype in ENERGY_TYPES:
+        for contract_type in CONTRACT_TYPES:
+            for segment in SEGMENTS:
+                for supplier in range(suppliers):
+                    for product in range(PRODUCTS_PER_SUPPLIER):
+                        for component in PRICE_COMPONENTS[energietype]:
+                            row_id = len(rows) + 1
+                            rows.append(
+                                {
+                                    "id": row_id,
+                                    "energietype": energietype,
+                                    "vast_variabel_dynamisch": contract_type,
+                                    "segment": segment,
+                                    "handelsnaam": f"Leverancier {supplier + 1:02d}",
+                                    "productnaam": f"{contract_type} product {product + 1}",
+                                    "prijsonderdeel": component,
+                                    "energieprijs_afname": 8 + row_id % 70 / 10,
+                                    "energieprijs_injectie": 2 + row_id % 30 / 10,
+                                    "vaste_vergoeding": 40 + row_id % 60,
+                                    "groene_stroom_afname": 1.14,
+                                    "wkk_afname": 0.4,
+                                    "indexatieparameter": "Belpex",
+                                    "looptijd": "1 jaar",
+                                    "opzegtermijn": "1 maand",
+                                    "url": f"https://example.invalid/{row_id}",
+                                }
+                            )
+    return rows
+
+
+def _slots(day: date, interval: int) -> list[datetime]:
+    """Return the start of every slot of a UTC day."""
+    start = datetime.combine(day, datetime.min.time(), timezone.utc)
+    return [
+        start + timedelta(minutes=minutes) for minutes in range(0, 24 * 60, interval)
+    ]
+
+
+def _prices(row: dict, direction: str, interval: int, now: datetime) -> dict:
+    """Return a prices_* block of a row, with slots for dynamic contracts."""
+    base = row[f"energieprijs_{direction}"] / 100
+    if row["vast_variabel_dynamisch"] != "Dynamisch":
+        return {"current_price": round(base, 5)}
+
+    def price(when: datetime) -> float:
+        hour = when.hour + when.minute / 60
+        return round(base * (1 + 0.4 * math.sin((hour - 7) / 24 * 2 * math.pi)), 5)
+
+    today = {when.isoformat(): price(when) for when in _slots(now.date(), interval)}
+    tomorrow = {
+        when.isoformat(): price(when)
+        for when in _slots(now.date() + timedelta(days=1), interval)
+    }
+    return {"current_price": price(now), "today": today, "tomorrow": tomorrow}
+
+
+class StandInApi:
+    """aiohttp application answering like the real API."""
+
+    def __init__(self, suppliers: int) -> None:
+        """Initialize the catalog and counters."""
+        self.catalog = build_catalog(suppliers)
+        self.requests: dict[str, int] = {}
+        self.bytes = 0
+
+    def application(self) -> web.Application:
+        """Return the aiohttp application."""
+        app = web.Application(middlewares=[self._count])
+        app.router.add_get("/data", self._data)
+        app.router.add_get("/month", self._month)
+        app.router.add_get("/constants", self._constants)
+        app.router.add_get("/_stats", self._stats)
+        return app
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler):
+        if request.path != "/_stats":
+            self.requests[request.path] = self.requests.get(request.path, 0) + 1
+            if not request.headers.get("Authorization"):
+                return web.Response(status=401)
+        response = await handler(request)
+        if request.path != "/_stats" and response.body is not None:
+            self.bytes += len(response.body)
+        return response
+
+    async def _data(self, request: web.Request) -> web.Response:
+        query = request.query
+        now = datetime.now(timezone.utc)
+        # Prices change every slot, the catalog once a month
+        version = now.strftime("%Y%m%d%H") if "show_prices" in query else "catalog"
+        etag = '"{}"'.format(
+            hashlib.sha1(
+                f"{sorted(query.items())}{version}".encode(), usedforsecurity=False
+            ).hexdigest()
+        )
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+
+        interval = int(query.get("interval", 60))
+        show_prices = query.get("show_prices") == "yes"
+        data: dict[str, dict] = {}
+        for row in self.catalog:
+            if any(name in query and row[name] != query[name] for name in FILTERS):
+                continue
+            if show_prices:
+                row = {
+                    **row,
+                    "prices_afname": _prices(row, "afname", interval, now),
+                    "prices_injectie": _prices(row, "injectie", interval, now),
+                }
+            group = data.setdefault(
+                row["handelsnaam"], {"name": row["handelsnaam"], "prijsonderdelen": []}
+            )
+            group["prijsonderdelen"].append(row)
+
+        count = sum(len(group["prijsonderdelen"]) for group in data.values())
+        body = json.dumps({"data": data, "count": count})
+        return web.Response(
+            text=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+    async def _month(self, request: web.Request) -> web.Response:
+        today = datetime.now(timezone.utc).date()
+        return web.json_response({"jaar": today.year, "maand": today.month})
+
+    async def _constants(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"postcode": request.query.get("postcode"), **CONSTANTS}
+        )
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        stats = {"requests": dict(self.requests), "bytes": self.bytes}
+        if "reset" in request.query:
+            self.requests = {}
+            self.bytes = 0
+        return web.json_response(stats)
+
+
+async def async_serve(port: int, suppliers: int) -> None:
+    """Serve the stand-in API until cancelled."""
+    runner = web.AppRunner(StandInApi(suppliers).application(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def serve(port: int, suppliers: int) -> None:
+    """Serve the stand-in API, the entry point of the server process."""
+    try:
+        asyncio.run(async_serve(port, suppliers))
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    """Run the stand-in API from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--suppliers", type=int, default=20)
+    args = parser.parse_args()
+    serve(args.port, args.suppliers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,107 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.typing import ConfigType
 
 from .api import MyApi
-from .const import DOMAIN
+from .clients import async_get_clients
+from .comparison import ContractComparison, async_remove_comparison
+from .const import API_BASE_URL, COMPARISON_MINUTE, DOMAIN
+from .coordinator import SmartEnergyControlCoordinator
+from .price_history import PriceHistory
+from .services import async_setup_services
+from .storage import async_get_sensor_store
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
-SmartEnergyControlConfigEntry = ConfigEntry[MyApi]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+@dataclass
+class SmartEnergyControlData:
+    """Runtime data shared by the platforms of a config entry."""
+
+    api: MyApi
+    coordinator: SmartEnergyControlCoordinator
+    comparison: ContractComparison
+
+
+SmartEnergyControlConfigEntry = ConfigEntry[SmartEnergyControlData]
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the smartenergycontrol services."""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up smartenergycontrol - api2 from a config entry."""
-    entry.async_on_unload(entry.add_update_listener(update_listener))
-
     api_key = entry.data.get("api_key", "")
-    base_url = "https://api.smartenergycontrol.be/data"
-
-    api = MyApi(base_url, api_key)
-    await api.start_session()
+    base_url = API_BASE_URL
 
-    if not await api.validate_connection():
-        await api.close()
+    # Entries with the same API key share one client
+    api = await async_get_clients(hass).async_acquire(entry.entry_id, base_url, api_key)
+    if api is None:
         return False
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = api
+    coordinator = SmartEnergyControlCoordinator(hass, entry, api)
+    comparison = ContractComparison(hass, entry, coordinator)
+    price_history = PriceHistory(hass, coordinator)
+    await comparison.async_load()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = SmartEnergyControlData(
+        api, coordinator, comparison
+    )
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Keep the prices of the previous day for the last hours of the comparison
+    entry.async_on_unload(coordinator.async_add_listener(comparison.async_keep_prices))
+
+    # Keep the long-term statistics of the prices up to date
+    entry.async_on_unload(coordinator.async_add_listener(price_history.async_write))
+
+    # Add the cost of newly recorded hours shortly after every hour
+    entry.async_on_unload(
+        async_track_time_change(
+            hass, comparison.async_update, minute=COMPARISON_MINUTE, second=0
+        )
+    )
+    entry.async_create_background_task(
+        hass, _async_start(coordinator, comparison), f"{DOMAIN} {entry.entry_id}"
+    )
+
     return True
 
 
+async def _async_start(
+    coordinator: SmartEnergyControlCoordinator, comparison: ContractComparison
+) -> None:
+    """Fetch the first prices, then catch up on the contract comparison."""
+    await coordinator.async_startup_refresh()
+    await comparison.async_update()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    api: MyApi = hass.data[DOMAIN].pop(entry.entry_id)
-    await api.close()
+    data: SmartEnergyControlData = hass.data[DOMAIN].pop(entry.entry_id)
+    await data.coordinator.async_shutdown()
+    await async_get_clients(hass).async_release(entry.entry_id)
 
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
-async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    """Trigger when config changes happen."""
-    await hass.config_entries.async_reload(entry.entry_id)
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the tracked contracts of a removed config entry."""
+    store = await async_get_sensor_store(hass)
+    store.async_remove_entry(entry.entry_id)
+    await async_remove_comparison(hass, entry.entry_id)
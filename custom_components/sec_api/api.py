@@ -1,52 +1,165 @@
 import aiohttp
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+import json
 import logging
+import random
+import time
 import urllib.parse
 
+import ijson
+
+from homeassistant.util import dt as dt_util
+
+from .catalog import CatalogIndex
+from .const import (
+    API_BACKOFF,
+    API_BACKOFF_MAX,
+    API_BURST,
+    API_MAX_RETRIES,
+    API_RATE,
+    API_RETRY_AFTER_MAX,
+    CIRCUIT_RESET_TIME,
+    CIRCUIT_THRESHOLD,
+    CONDITIONAL_CACHE_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_TIMEOUT,
+    MONTH_CACHE_TTL,
+    PRICE_INTERVAL,
+)
+from .metrics import ApiMetrics
+from .ratelimit import CircuitBreaker, TokenBucket, parse_retry_after
+
 _LOGGER = logging.getLogger(__name__)
 
+try:
+    import brotli  # noqa: F401
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+else:
+    ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+class ApiError(Exception):
+    """Error communicating with the Smart Energy Control API."""
+
+
+class ApiUnavailableError(ApiError):
+    """The API failed repeatedly and is not called until the circuit closes."""
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Create a session with a pooled keep-alive connector and timeouts.
+
+    Connections to the API are reused between requests, DNS answers are
+    cached and a hung request can not block an update forever.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_MAX_CONNECTIONS,
+        limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
+
+
+@dataclass
+class CachedResponse:
+    """Validators and parsed payload of a previous /data response."""
+
+    etag: str | None
+    last_modified: str | None
+    payload: dict
+
 
 class MyApi:
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        session: aiohttp.ClientSession,
+    ):
         self.base_url = base_url
         self.api_key = api_key
-        self.session = None
+        self.session = session
         self.data = {}
+        self._current_time = None
+        self._current_time_month = None
+        self._current_time_expires = 0.0
+        self._current_time_task = None
+        self._catalog = None
+        self._catalog_month = None
+        self._catalog_task = None
+        self._responses: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.metrics = ApiMetrics()
+        self.bucket = TokenBucket(API_RATE, API_BURST)
+        self.breaker = CircuitBreaker(CIRCUIT_THRESHOLD, CIRCUIT_RESET_TIME * 60)
 
     async def validate_connection(self) -> bool:
         """Validate the API connection and authentication."""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}",
-                    headers={"Authorization": self.api_key},
-                ) as response:
-                    if response.status == 200:
-                        _LOGGER.debug(
-                            "Successfully authenticated with the Smart Energy Control API."
-                        )
-                        return True
-                    else:
-                        _LOGGER.info(
-                            "Failed to authenticate with the Smart Energy Control API. Status code: %s",
-                            response.status,
-                        )
-                        return False
+            async with self.session.get(
+                f"{self.base_url}",
+                headers={"Authorization": self.api_key},
+            ) as response:
+                if response.status == 200:
+                    _LOGGER.debug(
+                        "Successfully authenticated with the Smart Energy Control API."
+                    )
+                    return True
+                else:
+                    _LOGGER.info(
+                        "Failed to authenticate with the Smart Energy Control API. Status code: %s",
+                        response.status,
+                    )
+                    return False
         except Exception as e:
             _LOGGER.error("Error validating API connection: %s", e)
             return False
 
-    async def start_session(self):
-        """Start the aiohttp session."""
-        self.session = aiohttp.ClientSession()
-
     async def close(self):
-        """Close the aiohttp session."""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Cancel the requests in flight, the shared session stays open."""
+        for task in self._in_flight.values():
+            task.cancel()
+        for task in (self._catalog_task, self._current_time_task):
+            if task is not None:
+                task.cancel()
 
     async def fetch_data(self, *args):
-        """Fetch data from the API."""
+        """Fetch data from the API.
+
+        Responses carrying an ETag or Last-Modified header are remembered per
+        query and revalidated on the next call, so an unchanged payload costs
+        a 304 instead of a full download and JSON parse. Concurrent identical
+        queries share one request. The returned payload may be shared between
+        callers and must not be mutated.
+        """
+        url = self._build_url(*args)
+
+        task = self._in_flight.get(url)
+        self.metrics.cache("in_flight").record(task is not None)
+        if task is not None:
+            return await asyncio.shield(task)
+
+        task = asyncio.create_task(self._request(url))
+        self._in_flight[url] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        return await asyncio.shield(task)
+
+    def _build_url(self, *args) -> str:
+        """Return the /data URL of a query."""
         _args = []
         for arg in args:
             _arg = arg.split("=")
@@ -57,23 +170,42 @@ class MyApi:
                 _arg = "=".join(_arg)
             else:
                 _arg = _arg[0]
-            _args.append(_arg)
-        async with self.session.get(
-            f"{self.base_url}?{'&'.join(_args)}",
-            headers={"Authorization": self.api_key},
-        ) as response:
-            return await response.json()
+            if _arg:
+                _args.append(_arg)
+        # Normalised so the same filters in another order hit the same entry
+        return f"{self.base_url}?{'&'.join(sorted(_args))}"
+
+    async def _request(self, url: str):
+        """Send a /data request, revalidating a previous response if possible."""
+        headers = {"Authorization": self.api_key, "Accept-Encoding": ACCEPT_ENCODING}
+        cached = self._responses.get(url)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        status, response_headers, payload = await self._async_get(url, headers)
+        self.metrics.cache("conditional").record(status == 304)
+        if status == 304 and cached is not None:
+            self._responses.move_to_end(url)
+            return cached.payload
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+
+        if etag or last_modified:
+            self._responses[url] = CachedResponse(etag, last_modified, payload)
+            self._responses.move_to_end(url)
+            while len(self._responses) > CONDITIONAL_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        else:
+            self._responses.pop(url, None)
+        return payload
 
     async def fetch_keys(self):
         """Fetch only key names."""
-        data = {}
-        current_times = await self.get_current_time()
-        data = await self.fetch_data(
-            f"maand={current_times["maand"]}",
-            f"jaar={current_times["jaar"]}",
-        )
-        data = data.get("data", {})
-        return [x["name"] for _, x in data.items()]
+        catalog = await self.get_catalog()
+        return list(catalog.names)
 
     async def fetch_data_only(self, *args, show_prices=False, zip_code="2060"):
         """Fetch only data without metadata."""
@@ -88,23 +220,181 @@ class MyApi:
             f"jaar={current_times["jaar"]}",
             *args,
             sp,
-            "interval=30",
+            f"interval={PRICE_INTERVAL}",
         )
         return data.get("data", {})
 
+    async def get_catalog(self) -> CatalogIndex:
+        """Return the contract catalog index, downloaded once per month.
+
+        The unfiltered catalog is the largest response of the API, so it is
+        parsed while it streams in and only the fields of the index are kept.
+        Concurrent callers share a single download.
+        """
+        current_times = await self.get_current_time()
+        month = (current_times["jaar"], current_times["maand"])
+        hit = self._catalog is not None and self._catalog_month == month
+        self.metrics.cache("catalog").record(hit)
+        if hit:
+            return self._catalog
+
+        if self._catalog_task is None:
+            self._catalog_task = asyncio.create_task(self._fetch_catalog(current_times))
+        return await asyncio.shield(self._catalog_task)
+
+    async def _fetch_catalog(self, current_times: dict) -> CatalogIndex:
+        """Stream the unfiltered catalog of a month into an index."""
+        url = self._build_url(
+            f"maand={current_times["maand"]}",
+            f"jaar={current_times["jaar"]}",
+            f"interval={PRICE_INTERVAL}",
+        )
+        try:
+            _, _, catalog = await self._async_get(
+                url,
+                {"Authorization": self.api_key, "Accept-Encoding": ACCEPT_ENCODING},
+                lambda response: CatalogIndex.async_from_stream(response.content),
+            )
+        finally:
+            self._catalog_task = None
+
+        self._catalog = catalog
+        self._catalog_month = (current_times["jaar"], current_times["maand"])
+        return catalog
+
     async def get_current_time(self):
-        "Get current year and month."
-        # print(f"Fetching {self.base_url[:-5]}/month")
-        async with self.session.get(
-            f"{self.base_url[:-5]}/month",
-            headers={"Authorization": self.api_key},
-        ) as response:
-            return await response.json()
+        """Get current year and month.
+
+        The answer only changes once a month, so it is cached until the local
+        calendar month changes or MONTH_CACHE_TTL expires. Concurrent callers
+        share a single in-flight request.
+        """
+        # The host clock is often UTC, the month rolls over at local midnight
+        month = dt_util.now().date().replace(day=1)
+        if (
+            self._current_time is not None
+            and self._current_time_month == month
+            and time.monotonic() < self._current_time_expires
+        ):
+            self.metrics.cache("month").record(True)
+            return self._current_time
+
+        self.metrics.cache("month").record(False)
+        if self._current_time_task is None:
+            self._current_time_task = asyncio.create_task(
+                self._fetch_current_time(month)
+            )
+        return await asyncio.shield(self._current_time_task)
+
+    async def _fetch_current_time(self, month: date):
+        """Fetch the current year and month from the /month endpoint."""
+        try:
+            _, _, current_time = await self._async_get(
+                f"{self.base_url[:-5]}/month",
+                {"Authorization": self.api_key},
+            )
+        finally:
+            self._current_time_task = None
+
+        self._current_time = current_time
+        self._current_time_month = month
+        self._current_time_expires = time.monotonic() + MONTH_CACHE_TTL * 60
+        return current_time
 
     async def get_constants(self, zip_code):
         """Get constants from the /constants endpoint."""
-        async with self.session.get(
+        _, _, constants = await self._async_get(
             f"{self.base_url[:-5]}/constants?postcode={zip_code}",
-            headers={"Authorization": self.api_key},
-        ) as response:
-            return await response.json()
+            {"Authorization": self.api_key},
+        )
+        return constants
+
+    async def _async_get(
+        self,
+        url: str,
+        headers: dict,
+        parse: Callable[[aiohttp.ClientResponse], Awaitable[Any]] | None = None,
+    ) -> tuple[int, Mapping, Any]:
+        """Send a GET request and parse the JSON answer, or stream it to parse.
+
+        Requests are rate limited by a token bucket. 429 and 5xx answers and
+        connection errors are retried with exponential backoff and full
+        jitter, waiting at least as long as a Retry-After header asks. Other
+        error statuses and bodies that are not valid JSON raise ApiError
+        right away. A request that still fails counts
+        towards the circuit breaker; while it is open ApiUnavailableError is
+        raised without calling the API. The parsed body is None for a 304.
+        Latency, size and decode time of every attempt are recorded in the
+        metrics of the endpoint.
+        """
+        if self.breaker.is_open:
+            raise ApiUnavailableError(
+                f"API unavailable, retrying in {self.breaker.remaining:.0f} s"
+            )
+
+        metrics = self.metrics.endpoint(urllib.parse.urlsplit(url).path.split("/")[-1])
+        for attempt in range(API_MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            delay = random.uniform(0, min(API_BACKOFF * 2**attempt, API_BACKOFF_MAX))
+            metrics.requests += 1
+            started = time.perf_counter()
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status >= 400:
+                        metrics.errors += 1
+                    if response.status == 429:
+                        error = ApiError("API rate limit exceeded")
+                        retry_after = parse_retry_after(
+                            response.headers.get("Retry-After")
+                        )
+                        if retry_after is not None:
+                            delay = max(delay, retry_after)
+                            self.bucket.pause(min(retry_after, API_RETRY_AFTER_MAX))
+                    elif response.status >= 500:
+                        error = ApiError(f"API returned status {response.status}")
+                    elif response.status >= 400:
+                        # The API is up, the request itself is wrong
+                        self.breaker.record_success()
+                        raise ApiError(f"API returned status {response.status}")
+                    else:
+                        payload = None
+                        try:
+                            if response.status == 304:
+                                metrics.not_modified += 1
+                            elif parse is not None:
+                                payload = await parse(response)
+                                metrics.bytes += response.content.total_bytes
+                            else:
+                                body = await response.read()
+                                decode_started = time.perf_counter()
+                                payload = json.loads(body)
+                                metrics.decode_ms += (
+                                    time.perf_counter() - decode_started
+                                ) * 1000
+                                metrics.bytes += len(body)
+                        except (ValueError, ijson.JSONError) as err:
+                            # The API is up, its answer is not valid JSON
+                            metrics.errors += 1
+                            self.breaker.record_success()
+                            raise ApiError(f"Invalid answer from API: {err}") from err
+                        self.breaker.record_success()
+                        return response.status, response.headers, payload
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                metrics.errors += 1
+                error = ApiError(f"Error communicating with API: {err}")
+            finally:
+                metrics.latency.observe((time.perf_counter() - started) * 1000)
+
+            if attempt == API_MAX_RETRIES or delay > API_RETRY_AFTER_MAX:
+                break
+            _LOGGER.debug("%s, retrying %s in %.1f s", error, url, delay)
+            await asyncio.sleep(delay)
+
+        self.breaker.record_failure()
+        if self.breaker.is_open:
+            _LOGGER.warning(
+                "Smart Energy Control API failed %s times, pausing requests for %s minutes",
+                self.breaker.failures,
+                CIRCUIT_RESET_TIME,
+            )
+        raise error
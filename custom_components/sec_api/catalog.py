@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import ijson
+
+# Fields of a price component row the index is built from
+INDEX_FIELDS = (
+    "id",
+    "energietype",
+    "vast_variabel_dynamisch",
+    "segment",
+    "handelsnaam",
+    "productnaam",
+    "prijsonderdeel",
+)
+_ROW_SUFFIXES = tuple(f".prijsonderdelen.item.{field}" for field in INDEX_FIELDS)
+
+
+class CatalogIndex:
+    """Nested index of the monthly V-test contract catalog.
+
+    Rows are grouped by (energietype, vast_variabel_dynamisch, segment), then
+    handelsnaam, productnaam and prijsonderdeel, so every options flow step
+    is a dictionary lookup instead of a scan over the full catalog.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._index: dict[
+            tuple[str, str, str], dict[str, dict[str, dict[str, int]]]
+        ] = {}
+        self.names: list[str] = []
+
+    @classmethod
+    async def async_from_stream(cls, stream) -> CatalogIndex:
+        """Build the index from parse events while a /data body is read.
+
+        Only the contract names and the INDEX_FIELDS of the row being parsed
+        are held, the rest of the response is never materialised, so memory
+        use does not grow with the size of the catalog.
+        """
+        index = cls()
+        row: dict = {}
+        # {"data": {key: {"name": ..., "prijsonderdelen": [{field: ...}]}}}
+        depth = 0
+        async for prefix, event, value in ijson.parse_async(stream, use_float=True):
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                if depth == 5 and prefix.endswith(".prijsonderdelen.item"):
+                    if len(row) == len(INDEX_FIELDS):
+                        index.add(row)
+                    row = {}
+                depth -= 1
+            elif event != "map_key" and prefix.startswith("data."):
+                if depth == 3 and prefix.endswith(".name"):
+                    index.names.append(value)
+                elif depth == 5 and prefix.endswith(_ROW_SUFFIXES):
+                    row[prefix.rsplit(".", 1)[1]] = value
+        return index
+
+    def add(self, row: dict) -> None:
+        """Add a price component row to the index."""
+        key = (row["energietype"], row["vast_variabel_dynamisch"], row["segment"])
+        products = self._index.setdefault(key, {}).setdefault(row["handelsnaam"], {})
+        products.setdefault(row["productnaam"], {})[row["prijsonderdeel"]] = row["id"]
+
+    def suppliers(
+        self, energietype: str, vast_variabel_dynamisch: str, segment: str
+    ) -> list[str]:
+        """Return the suppliers offering contracts of the given kind."""
+        return list(
+            self._index.get((energietype, vast_variabel_dynamisch, segment), {})
+        )
+
+    def products(
+        self,
+        energietype: str,
+        vast_variabel_dynamisch: str,
+        segment: str,
+        handelsnaam: str,
+    ) -> list[str]:
+        """Return the products of a supplier."""
+        suppliers = self._index.get((energietype, vast_variabel_dynamisch, segment), {})
+        return list(suppliers.get(handelsnaam, {}))
+
+    def price_components(
+        self,
+        energietype: str,
+        vast_variabel_dynamisch: str,
+        segment: str,
+        handelsnaam: str,
+        productnaam: str,
+    ) -> list[str]:
+        """Return the price components of a product."""
+        suppliers = self._index.get((energietype, vast_variabel_dynamisch, segment), {})
+        return list(suppliers.get(handelsnaam, {}).get(productnaam, {}))
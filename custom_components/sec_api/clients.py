@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+
+from .api import MyApi, create_session
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@singleton(f"{DOMAIN}_session")
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the pooled session shared by all config entries."""
+    session = create_session()
+
+    async def _async_close(event: Event) -> None:
+        await session.close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+    return session
+
+
+@dataclass
+class _SharedClient:
+    """An API client and the config entries using it."""
+
+    api: MyApi
+    validation: asyncio.Task[bool]
+    entries: set[str] = field(default_factory=set)
+
+
+class ApiClients:
+    """API clients shared by the config entries using the same API key.
+
+    Entries for several sites under one key use one client, so the month
+    lookup, the catalog, the cached responses, the in-flight requests and
+    the rate limit are shared instead of multiplied. A client is closed
+    when the last entry using it releases it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty registry."""
+        self._hass = hass
+        self._clients: dict[tuple[str, str], _SharedClient] = {}
+        self._entries: dict[str, tuple[str, str]] = {}
+
+    async def async_acquire(
+        self, entry_id: str, base_url: str, api_key: str
+    ) -> MyApi | None:
+        """Return the client of an API key, None when the key is refused.
+
+        The connection is validated once per client, entries joining an
+        existing client wait for that validation instead of repeating it.
+        """
+        key = (base_url, api_key)
+        if (shared := self._clients.get(key)) is None:
+            api = MyApi(base_url, api_key, async_get_session(self._hass))
+            shared = self._clients[key] = _SharedClient(
+                api, self._hass.async_create_task(api.validate_connection())
+            )
+        shared.entries.add(entry_id)
+        self._entries[entry_id] = key
+
+        if await shared.validation:
+            _LOGGER.debug("API client shared by %s config entries", len(shared.entries))
+            return shared.api
+        await self.async_release(entry_id)
+        return None
+
+    async def async_release(self, entry_id: str) -> None:
+        """Stop using a client, closing it once no entry uses it."""
+        if (key := self._entries.pop(entry_id, None)) is None:
+            return
+        shared = self._clients[key]
+        shared.entries.discard(entry_id)
+        if not shared.entries:
+            del self._clients[key]
+            await shared.api.close()
+
+    @callback
+    def async_count_entries(self, api: MyApi) -> int:
+        """Return the number of config entries using a client."""
+        for shared in self._clients.values():
+            if shared.api is api:
+                return len(shared.entries)
+        return 0
+
+
+@singleton(f"{DOMAIN}_clients")
+@callback
+def async_get_clients(hass: HomeAssistant) -> ApiClients:
+    """Return the client registry shared by all config entries."""
+    return ApiClients(hass)
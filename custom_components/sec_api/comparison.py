@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+
+import numpy as np
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    COMPARISON_CHUNK_DAYS,
+    COMPARISON_HISTORY_DAYS,
+    COMPARISON_SAVE_DELAY,
+    COMPARISON_STORAGE_VERSION,
+    CONF_CONSUMPTION_ENTITY,
+    CONF_INJECTION_ENTITY,
+    DOMAIN,
+)
+from .coordinator import SmartEnergyControlCoordinator
+from .timeseries import PriceSeries
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+
+
+def _hourly_prices(series: PriceSeries | None, hours: np.ndarray) -> np.ndarray:
+    """Return the average price of a series for every hour start timestamp.
+
+    Hours without a known price in the series are NaN.
+    """
+    if series is None or series.is_empty:
+        return np.full(len(hours), np.nan)
+
+    slot = series.interval * 60
+    per_hour = max(HOUR // slot, 1)
+    first = (hours - series.start.timestamp()) // slot
+    index = first[:, None].astype(int) + np.arange(per_hour)
+    inside = (index >= 0) & (index < len(series.values))
+    prices = np.where(
+        inside, series.values[np.clip(index, 0, len(series.values) - 1)], np.nan
+    )
+
+    known = ~np.isnan(prices)
+    counts = known.sum(axis=1)
+    hourly = np.where(known, prices, 0.0).sum(axis=1) / np.maximum(counts, 1)
+    return np.where(counts > 0, hourly, np.nan)
+
+
+def _comparison_store(hass: HomeAssistant, entry_id: str) -> Store[dict]:
+    """Return the store holding the totals of a config entry."""
+    return Store(
+        hass,
+        COMPARISON_STORAGE_VERSION,
+        f"{DOMAIN}.comparison.{entry_id}",
+        atomic_writes=True,
+    )
+
+
+async def async_remove_comparison(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete the stored totals of a removed config entry."""
+    await _comparison_store(hass, entry_id).async_remove()
+
+
+class ContractComparison:
+    """Real cost of the recorded consumption for every tracked contract.
+
+    Hourly consumption and injection statistics are read from the recorder
+    in chunks off the event loop. Only hours after the last processed hour
+    are read, and daily and monthly totals per contract are kept in storage.
+
+    Only electricity contracts with known prices are compared, and only
+    hours every compared contract has a real price for are counted. The
+    all-in prices of the previous series are kept, so the last hour of a
+    day is still priced after the coordinator moved on to the new day.
+    Statistics older than the kept prices are not read at all, other hours
+    without prices are skipped.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        coordinator: SmartEnergyControlCoordinator,
+    ) -> None:
+        """Initialize the comparison."""
+        self._hass = hass
+        self._entry = entry
+        self._coordinator = coordinator
+        self._store = _comparison_store(hass, entry.entry_id)
+        self._lock = asyncio.Lock()
+        self.last_hour: datetime | None = None
+        self.daily: dict[str, dict[str, float]] = {}
+        self.monthly: dict[str, dict[str, float]] = {}
+        # Priced hours behind the totals, contracts added later have fewer
+        self.daily_hours: dict[str, dict[str, int]] = {}
+        self.monthly_hours: dict[str, dict[str, int]] = {}
+        self.skipped_hours = 0
+        # All-in prices of the current and the previous series by start
+        self._all_in: dict[datetime, dict[int, dict[str, PriceSeries]]] = {}
+
+    @callback
+    def async_keep_prices(self) -> None:
+        """Remember the all-in prices of a new series, called on updates."""
+        all_in = self._coordinator.all_in
+        if not all_in:
+            return
+        start = next(iter(next(iter(all_in.values())).values())).start
+        self._all_in[start] = all_in
+        for old in sorted(self._all_in)[:-2]:
+            del self._all_in[old]
+
+    def _hourly_all_in(
+        self, contract_id: int, direction: str, hours: np.ndarray
+    ) -> np.ndarray:
+        """Return the hourly all-in prices of a contract from the kept series."""
+        prices = np.full(len(hours), np.nan)
+        # The newest prices win where both series cover an hour
+        for start in sorted(self._all_in, reverse=True):
+            series = self._all_in[start].get(contract_id, {}).get(direction)
+            prices = np.where(np.isnan(prices), _hourly_prices(series, hours), prices)
+        return prices
+
+    @property
+    def signal(self) -> str:
+        """Return the dispatcher signal sent after new hours were processed."""
+        return f"{DOMAIN}_comparison_{self._entry.entry_id}"
+
+    async def async_load(self) -> None:
+        """Load the totals of previous runs."""
+        if (data := await self._store.async_load()) is None:
+            return
+        if data.get("last_hour"):
+            self.last_hour = dt_util.parse_datetime(data["last_hour"])
+        self.daily = data.get("daily", {})
+        self.monthly = data.get("monthly", {})
+        self.daily_hours = data.get("daily_hours", {})
+        self.monthly_hours = data.get("monthly_hours", {})
+
+    def _data_to_save(self) -> dict:
+        return {
+            "last_hour": self.last_hour.isoformat() if self.last_hour else None,
+            "daily": self.daily,
+            "monthly": self.monthly,
+            "daily_hours": self.daily_hours,
+            "monthly_hours": self.monthly_hours,
+        }
+
+    def cheapest(self, month: str) -> str | None:
+        """Return the sensor id of the cheapest tracked contract of a month.
+
+        A contract tracked for part of the month was priced for fewer hours,
+        so the totals are only compared over the days every ranked contract
+        was priced for the same hours.
+        """
+        ranked = set(self.monthly.get(month, {})) & set(self._coordinator.sensor_ids)
+        totals = dict.fromkeys(ranked, 0.0)
+        compared = False
+        for day, hours in self.daily_hours.items():
+            if not day.startswith(month) or not ranked <= set(hours):
+                continue
+            if len({hours[sensor_id] for sensor_id in ranked}) != 1:
+                continue
+            compared = True
+            for sensor_id in ranked:
+                totals[sensor_id] += self.daily[day][sensor_id]
+        if not compared:
+            return None
+        return min(totals, key=totals.get)
+
+    async def async_update(self, now: datetime | None = None) -> None:
+        """Process the hours recorded since the last run."""
+        statistic_ids = {
+            statistic_id
+            for statistic_id in (
+                self._entry.options.get(CONF_CONSUMPTION_ENTITY),
+                self._entry.options.get(CONF_INJECTION_ENTITY),
+            )
+            if statistic_id
+        }
+        self.async_keep_prices()
+        if not statistic_ids or not self._all_in:
+            return
+
+        async with self._lock:
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+            # Hours before the oldest kept prices can never be priced
+            oldest = dt_util.as_utc(min(self._all_in))
+            start = max(self.last_hour or oldest, oldest)
+            if start >= end:
+                return
+
+            while start < end:
+                chunk_end = min(start + timedelta(days=COMPARISON_CHUNK_DAYS), end)
+                stats = await get_instance(self._hass).async_add_executor_job(
+                    statistics_during_period,
+                    self._hass,
+                    start,
+                    chunk_end,
+                    statistic_ids,
+                    "hour",
+                    {"energy": UnitOfEnergy.KILO_WATT_HOUR},
+                    {"change"},
+                )
+                self._process(start, chunk_end, stats)
+                start = chunk_end
+
+            self.last_hour = end
+            self._prune(end)
+            self._store.async_delay_save(self._data_to_save, COMPARISON_SAVE_DELAY)
+        async_dispatcher_send(self._hass, self.signal)
+
+    def _process(self, start: datetime, end: datetime, stats: dict) -> None:
+        """Add the cost of every hour in [start, end) to the running totals."""
+        hours = np.arange(start.timestamp(), end.timestamp(), HOUR)
+        if not hours.size:
+            return
+
+        energy = {}
+        for key, option in (
+            ("afname", CONF_CONSUMPTION_ENTITY),
+            ("injectie", CONF_INJECTION_ENTITY),
+        ):
+            values = np.zeros(len(hours))
+            for row in stats.get(self._entry.options.get(option), []):
+                index = int((row["start"] - hours[0]) // HOUR)
+                if 0 <= index < len(hours) and row.get("change") is not None:
+                    values[index] = row["change"]
+            energy[key] = values
+
+        # The consumption entities measure electricity
+        sensor_ids = []
+        prices = {"afname": [], "injectie": []}
+        for sensor_id, contract_id in self._coordinator.sensor_ids.items():
+            contract = self._coordinator.contracts.get(contract_id, {})
+            if contract.get("energietype") != "Elektriciteit":
+                continue
+            afname = self._hourly_all_in(contract_id, "afname", hours)
+            if np.isnan(afname).all():
+                continue
+            injectie = self._hourly_all_in(contract_id, "injectie", hours)
+            if np.isnan(injectie).all():
+                # No injection tariff, injected energy is not paid for
+                injectie = np.zeros(len(hours))
+            sensor_ids.append(sensor_id)
+            prices["afname"].append(afname)
+            prices["injectie"].append(injectie)
+        if not sensor_ids:
+            self.skipped_hours += len(hours)
+            return
+
+        # cost[c, h] = afname[h] * afname_price[c, h] - injectie[h] * injectie_price[c, h]
+        afname, injectie = np.array(prices["afname"]), np.array(prices["injectie"])
+        priced = ~(np.isnan(afname).any(axis=0) | np.isnan(injectie).any(axis=0))
+        self.skipped_hours += int((~priced).sum())
+        cost = np.where(
+            priced,
+            energy["afname"] * afname - energy["injectie"] * injectie,
+            0.0,
+        )
+
+        days = [
+            dt_util.as_local(dt_util.utc_from_timestamp(hour)).date().isoformat()
+            for hour in hours
+        ]
+        day_keys, day_index = np.unique(days, return_inverse=True)
+        onehot = np.zeros((len(hours), len(day_keys)))
+        onehot[np.arange(len(hours)), day_index] = 1
+        day_totals = cost @ onehot
+        day_hours = (priced @ onehot).astype(int)
+
+        for d, day in enumerate(day_keys):
+            if not day_hours[d]:
+                continue
+            day, month = str(day), str(day)[:7]
+            daily = self.daily.setdefault(day, {})
+            monthly = self.monthly.setdefault(month, {})
+            daily_hours = self.daily_hours.setdefault(day, {})
+            monthly_hours = self.monthly_hours.setdefault(month, {})
+            for i, sensor_id in enumerate(sensor_ids):
+                daily[sensor_id] = daily.get(sensor_id, 0.0) + float(day_totals[i, d])
+                monthly[sensor_id] = monthly.get(sensor_id, 0.0) + float(
+                    day_totals[i, d]
+                )
+                daily_hours[sensor_id] = daily_hours.get(sensor_id, 0) + int(
+                    day_hours[d]
+                )
+                monthly_hours[sensor_id] = monthly_hours.get(sensor_id, 0) + int(
+                    day_hours[d]
+                )
+
+    def _prune(self, end: datetime) -> None:
+        """Drop daily totals older than the history window."""
+        oldest = (end - timedelta(days=COMPARISON_HISTORY_DAYS)).date().isoformat()
+        for day in [day for day in self.daily if day < oldest]:
+            del self.daily[day]
+            self.daily_hours.pop(day, None)
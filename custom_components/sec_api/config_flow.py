@@ -1,11 +1,18 @@
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
-from .const import DOMAIN, SENSORS_PATH
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.helpers import entity_registry as er, selector
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from .const import (
+    CONF_CONSUMPTION_ENTITY,
+    CONF_INJECTION_ENTITY,
+    DOMAIN,
+    SIGNAL_CONTRACTS_ADDED,
+)
+from .storage import async_get_sensor_store
 
 import logging
-import json
-import os
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 logging.getLogger(DOMAIN).setLevel(logging.INFO)
@@ -60,6 +67,8 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
                 return await self.async_step_remove_contract()
             if self.action == "Set current contract":
                 return await self.async_step_set_current_contract()
+            if self.action == "Set energy sensors":
+                return await self.async_step_energy_sensors()
             if self.action == "Update API key":
                 return await self.async_step_update_api_key()
             if self.action == "Update Zip code":
@@ -72,6 +81,7 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
                         "Add contract",
                         "Remove contract",
                         "Set current contract",
+                        "Set energy sensors",
                         "Update API key",
                         # "Update Zip code",
                     ]
@@ -116,22 +126,25 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
     async def async_step_remove_contract(self, user_input=None):
         """Handle the removal of a contract."""
         if user_input is not None:
-            # Remove the selected contract
+            # Remove the selected contract from the stored contracts
             selected_contract = user_input["selected_contract"]
-            # Access stored contracts and remove the selected one
-            contracts = self.hass.data["sec_sensors"][self.config_entry.entry_id]
-            contracts.pop(selected_contract, None)
-
-            # Update the entry in `hass.data` to reflect the removal
-            self.hass.data["sec_sensors"][self.config_entry.entry_id] = contracts
-
-            # Reload the entry to apply the change
-            await self.hass.config_entries.async_reload(self.config_entry.entry_id)
+            store = await async_get_sensor_store(self.hass)
+            store.async_remove_sensor(self.config_entry.entry_id, selected_contract)
+
+            # Stop fetching it and remove its entity, the other sensors stay
+            entry_data = self.hass.data[DOMAIN][self.config_entry.entry_id]
+            entry_data.coordinator.async_untrack_contract(selected_contract)
+            registry = er.async_get(self.hass)
+            if entity_id := registry.async_get_entity_id(
+                "sensor", DOMAIN, selected_contract
+            ):
+                registry.async_remove(entity_id)
 
             return self.async_create_entry(title="Contract Removed", data=None)
 
         # Fetch existing contracts
-        contracts = self.hass.data["sec_sensors"][self.config_entry.entry_id]
+        store = await async_get_sensor_store(self.hass)
+        contracts = store.async_get_sensors(self.config_entry.entry_id)
         contract_names = list(contracts.keys())
 
         data_schema = vol.Schema(
@@ -162,16 +175,18 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
 
             # Fire an event to notify the CurrentContractBinarySensor
             self.hass.bus.async_fire(
-                "current_contract_selected", {"selected_contract_id": selected_contract}
+                "current_contract_selected",
+                {
+                    "entry_id": self.config_entry.entry_id,
+                    "selected_contract_id": selected_contract,
+                },
             )
 
             return self.async_create_entry(title="Current Contract Set", data=None)
 
-        # Fetch existing contracts (sensors) from the JSON file
-        existing_sensors = await load_sensors_from_file()
-
         # Get contracts associated with the current entry_id
-        contracts = existing_sensors.get(self.config_entry.entry_id, {})
+        store = await async_get_sensor_store(self.hass)
+        contracts = store.async_get_sensors(self.config_entry.entry_id)
         contract_names = list(contracts.keys())
 
         # If no contracts are found, handle gracefully
@@ -198,25 +213,11 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
             self.supplier = user_input["selected_supplier"]
             return await self.async_step_contract_selection()
 
-        # Fetch the list of keys from the API using the existing API object
-        api = self.hass.data[DOMAIN][self.config_entry.entry_id]
-        contracts = await api.fetch_data_only()
-
-        # Normalize the data structure
-        all_contracts = []
-        for _, contract_value in contracts.items():
-            for price_component in contract_value.get("prijsonderdelen", []):
-                all_contracts.append(price_component)
-
-        # Filter suppliers based on the selected options
-        filtered_suppliers = list(
-            {
-                contract["handelsnaam"]
-                for contract in all_contracts
-                if contract["energietype"] == self.energy_type
-                and contract["vast_variabel_dynamisch"] == self.vast_variabel_dynamisch
-                and contract["segment"] == self.segment
-            }
+        # Look up the suppliers in the cached catalog index
+        api = self.hass.data[DOMAIN][self.config_entry.entry_id].api
+        catalog = await api.get_catalog()
+        filtered_suppliers = catalog.suppliers(
+            self.energy_type, self.vast_variabel_dynamisch, self.segment
         )
 
         data_schema = vol.Schema(
@@ -237,26 +238,11 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
             self.contract = user_input["selected_contract"]
             return await self.async_step_price_component_selection()
 
-        # Fetch the list of keys from the API using the existing API object
-        api = self.hass.data[DOMAIN][self.config_entry.entry_id]
-        contracts = await api.fetch_data_only()
-
-        # Normalize the data structure
-        all_contracts = []
-        for _, contract_value in contracts.items():
-            for price_component in contract_value.get("prijsonderdelen", []):
-                all_contracts.append(price_component)
-
-        # Filter contracts based on the selected supplier and remove duplicates
-        filtered_contracts = list(
-            {
-                contract["productnaam"]
-                for contract in all_contracts
-                if contract["handelsnaam"] == self.supplier
-                and contract["vast_variabel_dynamisch"] == self.vast_variabel_dynamisch
-                and contract["segment"] == self.segment
-                and contract["energietype"] == self.energy_type
-            }
+        # Look up the supplier's contracts in the cached catalog index
+        api = self.hass.data[DOMAIN][self.config_entry.entry_id].api
+        catalog = await api.get_catalog()
+        filtered_contracts = catalog.products(
+            self.energy_type, self.vast_variabel_dynamisch, self.segment, self.supplier
         )
 
         data_schema = vol.Schema(
@@ -274,49 +260,40 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
     async def async_step_price_component_selection(self, user_input=None):
         """Handle the selection of a price component."""
         if user_input is not None:
-            # Fetch the filtered contracts before creating the entry
-            api = self.hass.data[DOMAIN][self.config_entry.entry_id]
-
-            options = {
-                "energietype": self.energy_type,
-                "vast_variabel_dynamisch": self.vast_variabel_dynamisch,
-                "segment": self.segment,
-                "handelsnaam": self.supplier,
-                "productnaam": self.contract,
-                "prijsonderdeel": user_input["selected_price_component"],
-            }
-
-            self.hass.config_entries.async_update_entry(
-                self.config_entry,
-                options=options,
-                minor_version=self.config_entry.minor_version + 1,
+            # Fetch the rows of the selected contract
+            api = self.hass.data[DOMAIN][self.config_entry.entry_id].api
+            found_contracts = await api.fetch_data_only(
+                f"energietype={self.energy_type}",
+                f"vast_variabel_dynamisch={self.vast_variabel_dynamisch}",
+                f"segment={self.segment}",
+                f"handelsnaam={self.supplier}",
+                f"productnaam={self.contract}",
+                f"prijsonderdeel={user_input['selected_price_component']}",
+            )
+            rows = [
+                row
+                for contract in found_contracts.values()
+                for row in contract.get("prijsonderdelen", [])
+            ]
+
+            # The sensor platform adds the new sensors, the other sensors stay
+            async_dispatcher_send(
+                self.hass,
+                SIGNAL_CONTRACTS_ADDED.format(self.config_entry.entry_id),
+                rows,
             )
-            # Reload the entry to apply the change
-            await self.hass.config_entries.async_reload(self.config_entry.entry_id)
 
             return self.async_create_entry(title=None, data=None)
 
-        # Fetch the list of keys from the API using the existing API object
-        api = self.hass.data[DOMAIN][self.config_entry.entry_id]
-        contracts = await api.fetch_data_only()
-
-        # Normalize the data structure
-        all_contracts = []
-        for _, contract_value in contracts.items():
-            for price_component in contract_value.get("prijsonderdelen", []):
-                all_contracts.append(price_component)
-
-        # Filter price components based on the selected criteria
-        filtered_price_components = list(
-            {
-                component["prijsonderdeel"]
-                for component in all_contracts
-                if component["energietype"] == self.energy_type
-                and component["vast_variabel_dynamisch"] == self.vast_variabel_dynamisch
-                and component["segment"] == self.segment
-                and component["handelsnaam"] == self.supplier
-                and component["productnaam"] == self.contract
-            }
+        # Look up the contract's price components in the cached catalog index
+        api = self.hass.data[DOMAIN][self.config_entry.entry_id].api
+        catalog = await api.get_catalog()
+        filtered_price_components = catalog.price_components(
+            self.energy_type,
+            self.vast_variabel_dynamisch,
+            self.segment,
+            self.supplier,
+            self.contract,
         )
 
         data_schema = vol.Schema(
@@ -335,6 +312,56 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
             },
         )
 
+    async def async_step_energy_sensors(self, user_input=None):
+        """Handle the selection of the consumption and injection sensors."""
+        if user_input is not None:
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                options={
+                    **self.config_entry.options,
+                    CONF_CONSUMPTION_ENTITY: user_input.get(CONF_CONSUMPTION_ENTITY),
+                    CONF_INJECTION_ENTITY: user_input.get(CONF_INJECTION_ENTITY),
+                },
+            )
+            entry_data = self.hass.data[DOMAIN][self.config_entry.entry_id]
+            self.hass.async_create_task(entry_data.comparison.async_update())
+
+            return self.async_create_entry(title="Energy sensors set", data=None)
+
+        energy_selector = selector.EntitySelector(
+            selector.EntitySelectorConfig(
+                domain="sensor", device_class=SensorDeviceClass.ENERGY
+            )
+        )
+        data_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_CONSUMPTION_ENTITY,
+                    description={
+                        "suggested_value": self.config_entry.options.get(
+                            CONF_CONSUMPTION_ENTITY
+                        )
+                    },
+                ): energy_selector,
+                vol.Optional(
+                    CONF_INJECTION_ENTITY,
+                    description={
+                        "suggested_value": self.config_entry.options.get(
+                            CONF_INJECTION_ENTITY
+                        )
+                    },
+                ): energy_selector,
+            }
+        )
+
+        return self.async_show_form(
+            step_id="energy_sensors",
+            data_schema=data_schema,
+            description_placeholders={
+                "energy_sensors_help": "Select the energy sensors to compare contracts with",
+            },
+        )
+
     async def async_step_update_api_key(self, user_input=None):
         """Handle the update of the API key."""
         if user_input is not None:
@@ -394,15 +421,3 @@ class ExampleOptionsFlow(config_entries.OptionsFlow):
                 "update_zip_code_help": "Update your zip code",
             },
         )
-
-
-async def load_sensors_from_file():
-    """Load sensors from the local JSON file."""
-    if os.path.exists(SENSORS_PATH):
-        with open(SENSORS_PATH, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                _LOGGER.error("Failed to decode JSON file, returning empty dictionary")
-                return {}
-    return {}
@@ -6,9 +6,61 @@ DOMAIN = "sec_api"
 
 API_KEY = "api-key"
 API_URL = "http://localhost:5000/data"
+API_BASE_URL = "https://api.smartenergycontrol.be/data"
 
-SENSOR_REFRESH_TIME = 5  # In minutes
+SENSOR_REFRESH_TIME = 5  # In minutes, while tomorrow's dynamic prices are awaited
+DYNAMIC_REFRESH_TIME = 4  # Longest wait between dynamic price updates in hours
+DAY_AHEAD_HOUR = 13  # Local hour from which tomorrow's dynamic prices are expected
+MONTH_CACHE_TTL = 60  # In minutes
+PRICE_INTERVAL = 30  # Length of a price slot in minutes
+STARTUP_MAX_REQUESTS = 2  # Concurrent price requests during startup
+STARTUP_JITTER = 10  # Maximum startup delay of a price request in seconds
 
+DIRECTIONS = ("afname", "injectie")
+
+WINDOW_HOURS = (1, 2, 3)  # Lengths of the precomputed price windows
+WINDOW_COUNT = 3  # Precomputed windows per length and kind
+
+# Dispatcher signal with the rows of contracts added to a config entry
+SIGNAL_CONTRACTS_ADDED = f"{DOMAIN}_contracts_added_{{}}"
+
+CONF_CONSUMPTION_ENTITY = "consumption_entity"
+CONF_INJECTION_ENTITY = "injection_entity"
+
+COMPARISON_STORAGE_VERSION = 1
+COMPARISON_SAVE_DELAY = 30  # In seconds
+COMPARISON_HISTORY_DAYS = 365
+COMPARISON_CHUNK_DAYS = 31  # Days of statistics read per recorder query
+COMPARISON_MINUTE = 10  # Minute past the hour the comparison runs
+CONDITIONAL_CACHE_SIZE = 32  # Number of /data queries to revalidate
+
+HTTP_MAX_CONNECTIONS = 20  # Pooled connections shared by all config entries
+HTTP_MAX_CONNECTIONS_PER_HOST = 4
+HTTP_KEEPALIVE = 60  # Seconds an idle connection stays open for reuse
+HTTP_DNS_CACHE_TTL = 300  # In seconds
+HTTP_TIMEOUT = 30  # Total time of a request in seconds
+HTTP_CONNECT_TIMEOUT = 10  # In seconds
+
+API_RATE = 2  # Sustained requests per second per client
+API_BURST = 5  # Requests that may be sent at once
+API_MAX_RETRIES = 3
+API_BACKOFF = 1  # First retry delay in seconds, doubled on every retry
+API_BACKOFF_MAX = 60  # In seconds
+API_RETRY_AFTER_MAX = 300  # Longest Retry-After still waited for, in seconds
+CIRCUIT_THRESHOLD = 3  # Consecutive failed requests before polling stops
+CIRCUIT_RESET_TIME = 10  # In minutes
+
+CONSTANTS_STORAGE_KEY = "sec_constants"
+CONSTANTS_STORAGE_VERSION = 1
+CONSTANTS_SAVE_DELAY = 10  # In seconds
+CONSTANTS_REFRESH_TIME = 24  # Age in hours after which tariffs are fetched again
+CONSTANTS_CACHE_SIZE = 32  # Number of postcodes kept
+
+SENSOR_STORAGE_KEY = "sec_sensors"
+SENSOR_STORAGE_VERSION = 1
+SENSOR_SAVE_DELAY = 10  # In seconds
+
+# Location of the tracked sensors before they moved to .storage
 SENSORS_PATH = os.path.join(os.path.dirname(__file__), "sec_sensors.json")
 CURRENT_CONTRACT_PATH = os.path.join(
     os.path.dirname(__file__), "current_contract_sensor.json"
@@ -27,3 +79,5 @@ AANSLUITINGSVERGOEDING = 0.00075  #
 GSC = 0.0114  #
 # WKK 0.4(c€/kWh)*
 WKK = 0.004  #
+# btw op elektriciteit voor residentiële klanten
+BTW_WONING = 0.06
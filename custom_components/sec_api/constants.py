@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import ApiError, MyApi
+from .const import (
+    CONSTANTS_CACHE_SIZE,
+    CONSTANTS_REFRESH_TIME,
+    CONSTANTS_SAVE_DELAY,
+    CONSTANTS_STORAGE_KEY,
+    CONSTANTS_STORAGE_VERSION,
+    DOMAIN,
+)
+from .pricing import Tariffs
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ConstantsCache:
+    """Constants of the /constants endpoint per postcode, kept in .storage.
+
+    Postcodes are kept in least recently used order and the oldest are
+    dropped beyond CONSTANTS_CACHE_SIZE. Constants older than
+    CONSTANTS_REFRESH_TIME hours are fetched again, the stale values stay in
+    use when that fails. The parsed tariffs are cached too, so looking them
+    up is a dictionary access.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty cache."""
+        self._store: Store[dict] = Store(
+            hass, CONSTANTS_STORAGE_VERSION, CONSTANTS_STORAGE_KEY, atomic_writes=True
+        )
+        self._constants: OrderedDict[str, dict] = OrderedDict()
+        self._fetched: dict[str, datetime] = {}
+        self._tariffs: dict[str, Tariffs] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored constants."""
+        data = await self._store.async_load() or {}
+        for postcode, cached in data.get("postcodes", {}).items():
+            if (fetched := dt_util.parse_datetime(cached["fetched"])) is None:
+                continue
+            self._set(postcode, cached["constants"], fetched)
+
+    @callback
+    def async_get_constants(self, postcode: str) -> dict | None:
+        """Return the cached constants of a postcode."""
+        if (constants := self._constants.get(postcode)) is not None:
+            self._constants.move_to_end(postcode)
+        return constants
+
+    @callback
+    def async_get_tariffs(self, postcode: str) -> Tariffs:
+        """Return the tariffs of a postcode, the defaults when unknown."""
+        if (tariffs := self._tariffs.get(postcode)) is None:
+            return Tariffs()
+        return tariffs
+
+    async def async_refresh(self, api: MyApi, postcode: str) -> dict | None:
+        """Fetch the constants of a postcode unless the cached ones are fresh.
+
+        Concurrent refreshes of the same postcode share one request.
+        """
+        fetched = self._fetched.get(postcode)
+        max_age = timedelta(hours=CONSTANTS_REFRESH_TIME)
+        if fetched and dt_util.utcnow() - fetched < max_age:
+            return self.async_get_constants(postcode)
+
+        if (task := self._pending.get(postcode)) is None:
+            task = self._pending[postcode] = asyncio.create_task(
+                self._async_fetch(api, postcode)
+            )
+            task.add_done_callback(lambda _: self._pending.pop(postcode, None))
+        return await asyncio.shield(task)
+
+    async def _async_fetch(self, api: MyApi, postcode: str) -> dict | None:
+        """Fetch and store the constants of a postcode."""
+        try:
+            constants = await api.get_constants(postcode)
+        except ApiError as err:
+            _LOGGER.warning(f"Could not refresh the constants of {postcode}: {err}")
+            return self.async_get_constants(postcode)
+        if not isinstance(constants, dict):
+            return self.async_get_constants(postcode)
+
+        self._set(postcode, constants, dt_util.utcnow())
+        self._store.async_delay_save(self._data_to_save, CONSTANTS_SAVE_DELAY)
+        return constants
+
+    def _set(self, postcode: str, constants: dict, fetched: datetime) -> None:
+        """Cache the constants of a postcode, evicting the least recently used."""
+        self._constants[postcode] = constants
+        self._constants.move_to_end(postcode)
+        self._fetched[postcode] = fetched
+        self._tariffs[postcode] = Tariffs.from_constants(constants)
+        while len(self._constants) > CONSTANTS_CACHE_SIZE:
+            evicted, _ = self._constants.popitem(last=False)
+            self._fetched.pop(evicted, None)
+            self._tariffs.pop(evicted, None)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to store, least recently used first."""
+        return {
+            "postcodes": {
+                postcode: {
+                    "constants": constants,
+                    "fetched": self._fetched[postcode].isoformat(),
+                }
+                for postcode, constants in self._constants.items()
+            }
+        }
+
+
+@singleton(f"{DOMAIN}_{CONSTANTS_STORAGE_KEY}")
+async def async_get_constants_cache(hass: HomeAssistant) -> ConstantsCache:
+    """Return the shared constants cache, loading it on first use."""
+    cache = ConstantsCache(hass)
+    await cache.async_load()
+    return cache
@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timedelta
+import logging
+import random
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.singleton import singleton
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import MyApi
+from .const import (
+    DAY_AHEAD_HOUR,
+    DIRECTIONS,
+    DOMAIN,
+    DYNAMIC_REFRESH_TIME,
+    PRICE_INTERVAL,
+    SENSOR_REFRESH_TIME,
+    STARTUP_JITTER,
+    STARTUP_MAX_REQUESTS,
+    WINDOW_COUNT,
+    WINDOW_HOURS,
+)
+from .metrics import Histogram
+from .planner import WINDOW_KINDS, PriceWindow, find_windows
+from .pricing import Tariffs, compute_all_in
+from .timeseries import PriceSeries
+
+_LOGGER = logging.getLogger(__name__)
+
+# Filters every tracked contract is grouped on, one API query per group.
+GROUP_FILTERS = ("energietype", "vast_variabel_dynamisch", "segment")
+# Filters added to a group query when all contracts in the group share them.
+NARROWING_FILTERS = ("handelsnaam", "productnaam", "prijsonderdeel")
+
+
+@singleton(f"{DOMAIN}_startup_semaphore")
+def _startup_semaphore(hass: HomeAssistant) -> asyncio.Semaphore:
+    """Return the semaphore limiting startup requests of all config entries."""
+    return asyncio.Semaphore(STARTUP_MAX_REQUESTS)
+
+
+class SmartEnergyControlCoordinator(DataUpdateCoordinator[dict[int, dict]]):
+    """Fetch the prices of all tracked contracts of a config entry at once."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: MyApi) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {entry.entry_id}",
+            update_interval=timedelta(minutes=SENSOR_REFRESH_TIME),
+        )
+        self._api = api
+        self._entry = entry
+        self._contracts: dict[int, dict] = {}
+        self._sensor_ids: dict[str, int] = {}
+        self.series: dict[int, dict[str, PriceSeries]] = {}
+        self.all_in: dict[int, dict[str, PriceSeries]] = {}
+        self.windows: dict[tuple[int, str, str, float], list[PriceWindow]] = {}
+        self.tariffs = Tariffs()
+        self._rows: dict[int, dict] = {}
+        self._series_start = dt_util.start_of_local_day()
+        self._unsub_boundary: CALLBACK_TYPE | None = None
+        self._starting = False
+        self.startup_duration: float | None = None
+        self.update_durations = Histogram()
+        self.query_durations: dict[str, float] = {}
+
+    @property
+    def contracts(self) -> dict[int, dict]:
+        """Return the tracked contracts keyed by contract id."""
+        return self._contracts
+
+    @property
+    def sensor_ids(self) -> dict[str, int]:
+        """Return the contract ids keyed by contract sensor id."""
+        return self._sensor_ids
+
+    @property
+    def series_start(self) -> datetime:
+        """Return the start of the current price series."""
+        return self._series_start
+
+    def contract_id(self, sensor_id: str | None) -> int | None:
+        """Return the contract id behind a contract sensor id."""
+        return self._sensor_ids.get(sensor_id)
+
+    @callback
+    def async_set_tariffs(self, tariffs: Tariffs) -> None:
+        """Recompute the all-in prices with new tariffs."""
+        if tariffs == self.tariffs:
+            return
+        self.tariffs = tariffs
+        if self.data:
+            self._update_all_in(self.data, dt_util.now())
+            self.async_update_listeners()
+
+    @callback
+    def async_track_contract(self, sensor_id: str, contract: dict) -> None:
+        """Include a contract in the next refresh."""
+        self._contracts[contract["id"]] = contract
+        self._sensor_ids[sensor_id] = contract["id"]
+
+    @callback
+    def async_untrack_contract(self, sensor_id: str) -> None:
+        """Stop fetching a contract."""
+        contract_id = self._sensor_ids.pop(sensor_id, None)
+        self._contracts.pop(contract_id, None)
+
+    def _build_queries(self) -> list[list[str]]:
+        """Group the tracked contracts into a bounded set of API queries."""
+        groups: dict[tuple, list[dict]] = {}
+        for contract in self._contracts.values():
+            key = tuple(contract[name] for name in GROUP_FILTERS)
+            groups.setdefault(key, []).append(contract)
+
+        queries = []
+        for key, contracts in groups.items():
+            query = [f"{name}={value}" for name, value in zip(GROUP_FILTERS, key)]
+            for name in NARROWING_FILTERS:
+                values = {contract[name] for contract in contracts}
+                if len(values) == 1:
+                    query.append(f"{name}={values.pop()}")
+            queries.append(query)
+        return queries
+
+    async def async_startup_refresh(self) -> None:
+        """Run the first refresh with staggered, concurrency-limited requests.
+
+        Meant to run as a background task so Home Assistant startup does not
+        wait for the API, and so entries do not hit it in one burst.
+        """
+        started = time.monotonic()
+        self._starting = True
+        try:
+            await self.async_refresh()
+        finally:
+            self._starting = False
+        self.startup_duration = time.monotonic() - started
+        _LOGGER.info(
+            "Startup refresh of %s contracts finished in %.2f s",
+            len(self._contracts),
+            self.startup_duration,
+        )
+
+    async def _async_fetch_group(self, query: list[str], zip_code: str) -> dict:
+        """Fetch the prices of one group of contracts."""
+        if not self._starting:
+            return await self._async_timed_fetch(query, zip_code)
+
+        await asyncio.sleep(random.uniform(0, STARTUP_JITTER))
+        async with _startup_semaphore(self.hass):
+            return await self._async_timed_fetch(query, zip_code)
+
+    async def _async_timed_fetch(self, query: list[str], zip_code: str) -> dict:
+        """Fetch a group query and remember how long it took."""
+        started = time.perf_counter()
+        try:
+            return await self._api.fetch_data_only(
+                *query, show_prices=True, zip_code=zip_code
+            )
+        finally:
+            self.query_durations["&".join(query)] = (
+                time.perf_counter() - started
+            ) * 1000
+
+    async def _async_update_data(self) -> dict[int, dict]:
+        """Fetch every tracked contract and index the results by contract id."""
+        started = time.perf_counter()
+        try:
+            data = await self._async_fetch_all()
+        except UpdateFailed:
+            self.update_interval = timedelta(minutes=SENSOR_REFRESH_TIME)
+            raise
+        finally:
+            self.update_durations.observe((time.perf_counter() - started) * 1000)
+        self.update_interval = self._next_update_interval(dt_util.now())
+        return data
+
+    def _next_update_interval(self, now: datetime) -> timedelta:
+        """Return how long to wait before the next refresh.
+
+        Day-ahead prices are published once a day in the early afternoon, so
+        dynamic contracts are polled every few minutes only from
+        DAY_AHEAD_HOUR until tomorrow's prices are in, and otherwise a few
+        times a day and right after midnight to move on to the new day.
+        Fixed and variable prices only change with the month, their slots
+        move on to the new day at the slot boundary of midnight instead.
+        """
+        dynamic = [
+            self.series.get(contract_id, {})
+            for contract_id, contract in self._contracts.items()
+            if contract["vast_variabel_dynamisch"] == "Dynamisch"
+        ]
+        if not dynamic:
+            next_month = date(now.year + now.month // 12, now.month % 12 + 1, 1)
+            return _until(now, dt_util.start_of_local_day(next_month))
+
+        # Contracts without any slots will not get tomorrow's either
+        awaited = any(
+            series and not any(s.has_tomorrow for s in series.values())
+            for series in dynamic
+        )
+        published = now.replace(hour=DAY_AHEAD_HOUR, minute=0, second=0, microsecond=0)
+        if awaited and now >= published:
+            return timedelta(minutes=SENSOR_REFRESH_TIME)
+        if awaited:
+            next_update = published
+        else:
+            next_update = dt_util.start_of_local_day(now.date() + timedelta(days=1))
+        return min(_until(now, next_update), timedelta(hours=DYNAMIC_REFRESH_TIME))
+
+    async def _async_fetch_all(self) -> dict[int, dict]:
+        """Fetch the prices of all groups and build the new data."""
+        if not self._contracts:
+            return {}
+
+        if self._api.breaker.is_open:
+            # Do not send anything while the backend is known to be down
+            raise UpdateFailed(
+                f"API unavailable, retrying in {self._api.breaker.remaining:.0f} s"
+            )
+
+        zip_code = self._entry.data["zip_code"]
+        self.query_durations = {}
+        try:
+            results = await asyncio.gather(
+                *(
+                    self._async_fetch_group(query, zip_code)
+                    for query in self._build_queries()
+                )
+            )
+        except Exception as err:
+            raise UpdateFailed(f"Error fetching contract prices: {err}") from err
+
+        rows = {}
+        for found_contracts in results:
+            for contract in found_contracts.values():
+                for row in contract.get("prijsonderdelen", []):
+                    if row["id"] in self._contracts:
+                        rows[row["id"]] = row
+        self._rows = rows
+        data = self._build_series(dt_util.now())
+        self._async_schedule_boundary()
+        return data
+
+    def _build_series(self, now: datetime) -> dict[int, dict]:
+        """Build the series, all-in prices and windows of today from the rows."""
+        start = dt_util.start_of_local_day(dt_util.as_local(now))
+        data = {}
+        series = {}
+        for contract_id, row in self._rows.items():
+            data[contract_id], series[contract_id] = _split_series(row, start)
+        self.series = series
+        self._series_start = start
+        self._update_all_in(data, now)
+        self._update_windows(now)
+        return data
+
+    def diagnostics(self) -> dict:
+        """Return the timings of the price updates."""
+        return {
+            "contracts": len(self._contracts),
+            "queries": len(self._build_queries()),
+            "last_update_success": self.last_update_success,
+            "update_interval": str(self.update_interval),
+            "startup_duration_s": self.startup_duration,
+            "update_durations": self.update_durations.as_dict(),
+            "query_durations_ms": {
+                query: round(duration, 1)
+                for query, duration in self.query_durations.items()
+            },
+        }
+
+    def _update_windows(self, now: datetime) -> None:
+        """Plan the cheapest and most expensive windows of the new series."""
+        self.windows = {
+            (contract_id, direction, kind, hours): find_windows(
+                price_series, hours, WINDOW_COUNT, kind, now
+            )
+            for contract_id, series in self.series.items()
+            for direction, price_series in series.items()
+            for kind in WINDOW_KINDS
+            for hours in WINDOW_HOURS
+        }
+
+    def price_windows(
+        self,
+        contract_id: int,
+        direction: str,
+        kind: str,
+        hours: float,
+        count: int = WINDOW_COUNT,
+    ) -> list[PriceWindow]:
+        """Return the windows of a contract that have not ended yet.
+
+        The precomputed windows are used when they cover the request,
+        other lengths and counts are planned on demand.
+        """
+        now = dt_util.now()
+        windows = self.windows.get((contract_id, direction, kind, hours))
+        if windows is None or count > WINDOW_COUNT:
+            price_series = self.series.get(contract_id, {}).get(direction)
+            if price_series is None:
+                return []
+            windows = find_windows(price_series, hours, count, kind, now)
+        return [window for window in windows if window.end > now][:count]
+
+    def _update_all_in(self, data: dict[int, dict], now: datetime) -> None:
+        """Recompute the all-in prices of all contracts and the current prices."""
+        self.all_in = compute_all_in(
+            data, self.series, self.tariffs, self._series_start
+        )
+        self._update_current_prices(data, now)
+
+    def _update_current_prices(self, data: dict[int, dict], now: datetime) -> None:
+        """Set the current energy and all-in price of every contract."""
+        for contract_id, row in data.items():
+            for direction in DIRECTIONS:
+                prices = row.get(f"prices_{direction}")
+                if prices is None:
+                    continue
+                price_series = self.series.get(contract_id, {}).get(direction)
+                if price_series is not None:
+                    price = price_series.price_at(now)
+                    if price is not None:
+                        prices["current_price"] = price
+                all_in = self.all_in.get(contract_id, {}).get(direction)
+                if all_in is not None:
+                    prices["all_in_price"] = all_in.price_at(now)
+
+    @callback
+    def _async_schedule_boundary(self) -> None:
+        """Schedule a local price transition at the next slot boundary."""
+        if self._unsub_boundary:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+        if not self._rows:
+            return
+
+        # In UTC, local wall-clock arithmetic is off by an hour on DST days
+        start = dt_util.as_utc(dt_util.start_of_local_day())
+        interval = timedelta(minutes=PRICE_INTERVAL)
+        boundary = start + interval * ((dt_util.utcnow() - start) // interval + 1)
+        self._unsub_boundary = async_track_point_in_utc_time(
+            self.hass, self._async_handle_boundary, boundary
+        )
+
+    @callback
+    def _async_handle_boundary(self, now: datetime) -> None:
+        """Switch every contract to the price of the slot that just started.
+
+        The new prices come from the already downloaded series, so entities
+        update exactly on the boundary without a request to the API. At
+        midnight the series are rebuilt from the downloaded rows to start at
+        the new day, tomorrow's prices become today's.
+        """
+        self._unsub_boundary = None
+        if dt_util.as_local(now).date() != self._series_start.date():
+            self.data = self._build_series(now)
+        else:
+            self._update_current_prices(self.data or {}, now)
+        self.async_update_listeners()
+        self._async_schedule_boundary()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the scheduled refresh and price transition."""
+        await super().async_shutdown()
+        if self._unsub_boundary:
+            self._unsub_boundary()
+            self._unsub_boundary = None
+
+
+def _until(now: datetime, when: datetime) -> timedelta:
+    """Return the time until a moment, in absolute time across DST changes."""
+    return max(dt_util.as_utc(when) - dt_util.as_utc(now), timedelta(minutes=1))
+
+
+def _split_series(row: dict, start: datetime) -> tuple[dict, dict[str, PriceSeries]]:
+    """Move the raw price blocks of a row into compact price series.
+
+    The returned row keeps a summary of each prices_* block with today's
+    statistics, the slots themselves are only available through the series
+    and the get_price_series service. The current price stays the API value
+    until the coordinator resolves it from the series.
+    """
+    row = dict(row)
+    series = {}
+    for direction in DIRECTIONS:
+        prices = row.get(f"prices_{direction}")
+        if not isinstance(prices, dict):
+            continue
+        price_series = PriceSeries.from_prices(prices, start)
+        if price_series.is_empty:
+            row[f"prices_{direction}"] = {"current_price": prices.get("current_price")}
+            continue
+        series[direction] = price_series
+        row[f"prices_{direction}"] = {
+            "current_price": prices.get("current_price"),
+            **price_series.stats(price_series.today),
+        }
+    return row, series
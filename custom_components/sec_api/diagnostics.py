@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import SmartEnergyControlData
+from .clients import async_get_clients
+from .const import DOMAIN
+
+TO_REDACT = {"api_key"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data: SmartEnergyControlData = hass.data[DOMAIN][entry.entry_id]
+    comparison = data.comparison
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "api": {
+            # Shared by the entries with the same API key
+            "config_entries": async_get_clients(hass).async_count_entries(data.api),
+            **data.api.metrics.as_dict(),
+            "circuit_breaker": {
+                "failures": data.api.breaker.failures,
+                "open": data.api.breaker.is_open,
+                "retry_in_s": round(data.api.breaker.remaining),
+            },
+        },
+        "coordinator": data.coordinator.diagnostics(),
+        "comparison": {
+            "last_hour": (
+                comparison.last_hour.isoformat() if comparison.last_hour else None
+            ),
+            "days": len(comparison.daily),
+            "skipped_hours": comparison.skipped_hours,
+        },
+    }
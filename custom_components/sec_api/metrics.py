@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass
+class Histogram:
+    """Count of observed durations per LATENCY_BUCKETS bucket."""
+
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    total: float = 0.0
+    maximum: float = 0.0
+
+    @property
+    def count(self) -> int:
+        """Return the number of observations."""
+        return sum(self.counts)
+
+    @property
+    def average(self) -> float | None:
+        """Return the mean duration in milliseconds."""
+        return self.total / self.count if self.count else None
+
+    def observe(self, milliseconds: float) -> None:
+        """Add a duration."""
+        self.counts[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.total += milliseconds
+        self.maximum = max(self.maximum, milliseconds)
+
+    def as_dict(self) -> dict:
+        """Return the histogram for diagnostics."""
+        buckets = [f"<={bound}" for bound in LATENCY_BUCKETS] + [
+            f">{LATENCY_BUCKETS[-1]}"
+        ]
+        return {
+            "count": self.count,
+            "average_ms": round(self.average, 1) if self.count else None,
+            "max_ms": round(self.maximum, 1),
+            "buckets_ms": dict(zip(buckets, self.counts)),
+        }
+
+
+@dataclass
+class EndpointMetrics:
+    """Requests sent to one API endpoint and what they cost."""
+
+    requests: int = 0
+    errors: int = 0
+    not_modified: int = 0
+    bytes: int = 0
+    decode_ms: float = 0.0
+    latency: Histogram = field(default_factory=Histogram)
+
+    def as_dict(self) -> dict:
+        """Return the metrics for diagnostics."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "not_modified": self.not_modified,
+            "bytes": self.bytes,
+            "decode_ms": round(self.decode_ms, 1),
+            "latency": self.latency.as_dict(),
+        }
+
+
+@dataclass
+class CacheMetrics:
+    """Hits and misses of one cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float | None:
+        """Return the share of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def record(self, hit: bool) -> None:
+        """Count a lookup."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self) -> dict:
+        """Return the metrics for diagnostics."""
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hit_ratio}
+
+
+@dataclass
+class ApiMetrics:
+    """Instrumentation of an API client, per endpoint and per cache."""
+
+    endpoints: dict[str, EndpointMetrics] = field(default_factory=dict)
+    caches: dict[str, CacheMetrics] = field(default_factory=dict)
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """Return the metrics of an endpoint."""
+        return self.endpoints.setdefault(name, EndpointMetrics())
+
+    def cache(self, name: str) -> CacheMetrics:
+        """Return the metrics of a cache."""
+        return self.caches.setdefault(name, CacheMetrics())
+
+    @property
+    def requests(self) -> int:
+        """Return the number of requests sent to all endpoints."""
+        return sum(metrics.requests for metrics in self.endpoints.values())
+
+    def as_dict(self) -> dict:
+        """Return the metrics for diagnostics."""
+        return {
+            "endpoints": {
+                name: metrics.as_dict() for name, metrics in self.endpoints.items()
+            },
+            "caches": {
+                name: metrics.as_dict() for name, metrics in self.caches.items()
+            },
+        }
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from .timeseries import PriceSeries
+
+CHEAPEST = "cheapest"
+MOST_EXPENSIVE = "most_expensive"
+WINDOW_KINDS = (CHEAPEST, MOST_EXPENSIVE)
+
+
+@dataclass(frozen=True)
+class PriceWindow:
+    """Contiguous slots with their average price."""
+
+    start: datetime
+    end: datetime
+    average_price: float
+
+    def as_dict(self) -> dict:
+        """Return the window as a JSON friendly dict."""
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "average_price": round(self.average_price, 5),
+        }
+
+
+def find_windows(
+    series: PriceSeries,
+    hours: float,
+    count: int,
+    kind: str = CHEAPEST,
+    after: datetime | None = None,
+) -> list[PriceWindow]:
+    """Return the count cheapest or most expensive windows of a series.
+
+    The average of every window of the given length is computed in one
+    sliding pass over cumulative sums. Windows that contain a missing slot
+    or start before the slot covering after are skipped. The best windows
+    are picked greedily so they do not overlap, and returned in time order.
+    """
+    length = max(int(round(hours * 60 / series.interval)), 1)
+    first = 0
+    if after is not None and after > series.start:
+        if (first := series.index(after)) is None:
+            return []
+
+    values = series.values[first:]
+    if len(values) < length:
+        return []
+    missing = np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, values))))
+    gaps = np.concatenate(([0], np.cumsum(missing)))
+    averages = (sums[length:] - sums[:-length]) / length
+    averages[(gaps[length:] - gaps[:-length]) > 0] = np.nan
+
+    order = np.argsort(averages if kind == CHEAPEST else -averages)
+    taken = np.zeros(len(values), dtype=bool)
+    picked = []
+    for start in order:
+        if len(picked) == count or np.isnan(averages[start]):
+            break
+        if taken[start : start + length].any():
+            continue
+        taken[start : start + length] = True
+        picked.append(int(start))
+
+    return [
+        PriceWindow(
+            series.slot_start(first + start),
+            series.slot_start(first + start + length),
+            float(averages[start]),
+        )
+        for start in sorted(picked)
+    ]
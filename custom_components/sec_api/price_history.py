@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import datetime
+import logging
+
+import numpy as np
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import CURRENCY_EURO, UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DIRECTIONS, DOMAIN
+from .coordinator import SmartEnergyControlCoordinator
+from .timeseries import PriceSeries
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def statistic_id(contract_id: int, direction: str) -> str:
+    """Return the external statistic id of a contract price."""
+    return f"{DOMAIN}:contract_{contract_id}_{direction}"
+
+
+def _hourly_statistics(series: PriceSeries) -> list[StatisticData]:
+    """Return the mean, min and max of every hour with a known price."""
+    per_hour = max(60 // series.interval, 1)
+    hours = len(series.values) // per_hour
+    values = series.values[: hours * per_hour].reshape(hours, per_hour)
+    rows = []
+    for hour, slots in enumerate(values):
+        slots = slots[~np.isnan(slots)]
+        if slots.size:
+            rows.append(
+                StatisticData(
+                    start=series.slot_start(hour * per_hour),
+                    mean=float(slots.mean()),
+                    min=float(slots.min()),
+                    max=float(slots.max()),
+                )
+            )
+    return rows
+
+
+def _constant_series(row: dict, direction: str, start: datetime) -> PriceSeries | None:
+    """Return a series with the current price of a row in every slot."""
+    price = (row.get(f"prices_{direction}") or {}).get("current_price")
+    if not isinstance(price, (int, float)) or isinstance(price, bool):
+        return None
+    series = PriceSeries.empty(start)
+    series.values[:] = price
+    return series
+
+
+class PriceHistory:
+    """Write the downloaded price series to long-term statistics.
+
+    Every tracked contract gets an external statistic per direction with
+    the mean, min and max price of every hour, so price history comes from
+    the compact statistics tables instead of sensor states. Contracts
+    without a series, such as fixed and variable ones, have their current
+    price for every hour. The recorder
+    replaces rows with the same start, every refresh writes all hours of
+    today and tomorrow that changed since they were last written. Hours
+    that passed before a restart are filled in by the first refresh.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: SmartEnergyControlCoordinator
+    ) -> None:
+        """Initialize the price history."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._series: dict[int, dict[str, PriceSeries]] | None = None
+        self._written: dict[str, dict[datetime, StatisticData]] = {}
+
+    @callback
+    def async_write(self) -> None:
+        """Write the hours of new price series, called on coordinator updates."""
+        if self._coordinator.series is self._series:
+            # Only the current price moved on, the series are the same
+            return
+        self._series = self._coordinator.series
+        start = self._coordinator.series_start
+        for contract_id, row in (self._coordinator.data or {}).items():
+            contract = self._coordinator.contracts.get(contract_id)
+            if contract is None:
+                continue
+            series = self._series.get(contract_id, {})
+            for direction in DIRECTIONS:
+                if (price_series := series.get(direction)) is None:
+                    price_series = _constant_series(row, direction, start)
+                if price_series is not None:
+                    self._async_write_series(contract, direction, price_series)
+
+    @callback
+    def _async_write_series(
+        self, contract: dict, direction: str, series: PriceSeries
+    ) -> None:
+        """Write the hours of a series that changed since the last write."""
+        statistic = statistic_id(contract["id"], direction)
+        written = self._written.setdefault(statistic, {})
+        rows = [
+            row
+            for row in _hourly_statistics(series)
+            if written.get(row["start"]) != row
+        ]
+        if not rows:
+            return
+
+        name = " ".join(
+            (
+                contract["handelsnaam"],
+                contract["productnaam"],
+                contract["prijsonderdeel"],
+                direction,
+            )
+        )
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=name,
+            source=DOMAIN,
+            statistic_id=statistic,
+            unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+        )
+        async_add_external_statistics(self._hass, metadata, rows)
+        _LOGGER.debug(f"Wrote {len(rows)} hours of {statistic}")
+
+        # Hours before the series are never written again
+        for start in [start for start in written if start < series.start]:
+            del written[start]
+        written.update((row["start"], row) for row in rows)
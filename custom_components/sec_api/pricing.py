@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+import logging
+
+import numpy as np
+
+from .const import (
+    AANSLUITINGSVERGOEDING,
+    BIJDRAGE_ENERGIE,
+    BIJZ_ACCIJNS,
+    BTW_WONING,
+    DIRECTIONS,
+    GSC,
+    PRICE_INTERVAL,
+    WKK,
+)
+from .timeseries import PriceSeries
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Tariffs:
+    """Taxes, grid and certificate costs added to the electricity afname price.
+
+    All values are in €/kWh, vat is a fraction. Fields not provided by the
+    /constants endpoint keep the defaults from const.py.
+    """
+
+    bijz_accijns: float = BIJZ_ACCIJNS
+    bijdrage_energie: float = BIJDRAGE_ENERGIE
+    aansluitingsvergoeding: float = AANSLUITINGSVERGOEDING
+    nettarief: float = 0.0
+    gsc: float = GSC
+    wkk: float = WKK
+    btw: float = BTW_WONING
+
+    @classmethod
+    def from_constants(cls, constants: dict | None) -> Tariffs:
+        """Build the tariffs from a /constants response.
+
+        Fields are matched on name. A response without any of them, or
+        without the grid tariff that has no default, is logged, as the
+        all-in prices then leave those costs out.
+        """
+        values = {}
+        for field in fields(cls):
+            value = (constants or {}).get(field.name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[field.name] = float(value)
+        if constants and not values:
+            expected = [field.name for field in fields(cls)]
+            _LOGGER.warning(
+                f"No tariffs found in the constants {sorted(constants)}, expected "
+                f"{expected}; all-in prices use the default taxes and leave out "
+                "the grid tariff"
+            )
+        elif constants and "nettarief" not in values:
+            _LOGGER.warning(
+                "No nettarief in the constants, all-in prices leave out the grid tariff"
+            )
+        return cls(**values)
+
+    @property
+    def fixed(self) -> float:
+        """Return the surcharges that do not depend on the contract."""
+        return (
+            self.bijz_accijns
+            + self.bijdrage_energie
+            + self.aansluitingsvergoeding
+            + self.nettarief
+        )
+
+
+def _per_kwh(contract: dict, key: str, default: float) -> float:
+    """Return a c€/kWh contract field in €/kWh, or the default."""
+    value = contract.get(key)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value / 100
+    return default
+
+
+def compute_all_in(
+    contracts: dict[int, dict],
+    series: dict[int, dict[str, PriceSeries]],
+    tariffs: Tariffs,
+    start: datetime,
+    interval: int = PRICE_INTERVAL,
+) -> dict[int, dict[str, PriceSeries]]:
+    """Compute the all-in €/kWh price per slot of every contract at once.
+
+    Energy prices of all contracts are stacked into one (contracts, slots)
+    matrix per direction and the surcharges are applied in a single
+    vectorised pass. Contracts without a series use their current price for
+    every slot. Electricity afname pays the tariffs, certificates and VAT
+    (residential contracts only); the tariffs are electricity tariffs, so gas
+    and injectie are the energy price as is. The returned series are views
+    on the shared matrices.
+    """
+    contract_ids = list(contracts)
+    n_slots = len(PriceSeries.empty(start, interval).values)
+    energy = {
+        direction: np.full((len(contract_ids), n_slots), np.nan)
+        for direction in DIRECTIONS
+    }
+    surcharge = np.empty(len(contract_ids))
+    vat = np.empty(len(contract_ids))
+
+    for i, contract_id in enumerate(contract_ids):
+        contract = contracts[contract_id]
+        for direction in DIRECTIONS:
+            price_series = series.get(contract_id, {}).get(direction)
+            if price_series is not None:
+                energy[direction][i] = price_series.values
+                continue
+            current = (contract.get(f"prices_{direction}") or {}).get("current_price")
+            if isinstance(current, (int, float)):
+                energy[direction][i] = current
+        if contract.get("energietype") != "Elektriciteit":
+            surcharge[i] = vat[i] = 0.0
+            continue
+        surcharge[i] = (
+            tariffs.fixed
+            + _per_kwh(contract, "groene_stroom_afname", tariffs.gsc)
+            + _per_kwh(contract, "wkk_afname", tariffs.wkk)
+        )
+        vat[i] = tariffs.btw if contract.get("segment") == "Woning" else 0.0
+
+    afname = (energy["afname"] + surcharge[:, None]) * (1 + vat[:, None])
+    injectie = energy["injectie"]
+
+    return {
+        contract_id: {
+            "afname": PriceSeries(start, interval, afname[i]),
+            "injectie": PriceSeries(start, interval, injectie[i]),
+        }
+        for i, contract_id in enumerate(contract_ids)
+    }
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import time
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the seconds to wait from a Retry-After header value."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """Allow rate requests per second on average, in bursts up to capacity.
+
+    Waiters are served in order. After a 429 the bucket can be paused so
+    every caller sharing it backs off, not only the one that was refused.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """Initialize a full bucket."""
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for a number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """Stop calling the API after repeated failures.
+
+    After threshold consecutive failed requests the circuit opens for
+    reset_time seconds, during which no request is sent. Once it elapses
+    requests are tried again; one more failure opens it right away, a
+    success closes it.
+    """
+
+    def __init__(self, threshold: int, reset_time: float) -> None:
+        """Initialize a closed circuit."""
+        self._threshold = threshold
+        self._reset_time = reset_time
+        self.failures = 0
+        self._opened_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Return whether requests are currently blocked."""
+        return time.monotonic() < self._opened_until
+
+    @property
+    def remaining(self) -> float:
+        """Return the seconds until requests are tried again."""
+        return max(self._opened_until - time.monotonic(), 0.0)
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self._opened_until = 0.0
+
+    def record_failure(self) -> None:
+        """Count a failed request, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.failures >= self._threshold:
+            self._opened_until = time.monotonic() + self._reset_time
@@ -1,119 +1,84 @@
 from datetime import timedelta
-import json
 import logging
-import os
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    MATCH_ALL,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_interval,
 )
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from . import MyApi
-from .const import (
-    AANSLUITINGSVERGOEDING,
-    BIJDRAGE_ENERGIE,
-    BIJZ_ACCIJNS,
-    DOMAIN,
-    GSC,
-    SENSOR_REFRESH_TIME,
-    SENSORS_PATH,
-    WKK,
-)
+from . import MyApi, SmartEnergyControlData
+from .comparison import ContractComparison
+from .const import DOMAIN, SIGNAL_CONTRACTS_ADDED, WINDOW_HOURS
+from .constants import ConstantsCache, async_get_constants_cache
+from .coordinator import SmartEnergyControlCoordinator
+from .planner import WINDOW_KINDS
+from .storage import async_get_sensor_store
 
 _LOGGER = logging.getLogger(__name__)
 
 
-SENSOR_STORAGE_KEY = "sec_sensors"
-
-
-async def load_sensors_from_file():
-    """Load sensors from the local JSON file."""
-    if os.path.exists(SENSORS_PATH):
-        with open(SENSORS_PATH) as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                _LOGGER.error("Failed to decode JSON file, returning empty dictionary")
-                return {}
-    return {}
-
-
-async def save_sensors_to_file(sensors_data):
-    """Save sensors data to the local JSON file."""
-    with open(SENSORS_PATH, "w+") as f:
-        json.dump(sensors_data, f, indent=4)
-
-
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ):
     """Set up sensor platform."""
-    api: MyApi = hass.data[DOMAIN][entry.entry_id]
+    entry_data: SmartEnergyControlData = hass.data[DOMAIN][entry.entry_id]
+    api = entry_data.api
+    coordinator = entry_data.coordinator
 
-    existing_sensors = await load_sensors_from_file()
+    store = await async_get_sensor_store(hass)
+    existing_sensors = store.async_get_sensors(entry.entry_id)
 
     sensors = []
 
     # Initialize and add CurrentContractSensor
     current_contract_sensor = CurrentContractSensor(hass, entry)
     sensors.append(current_contract_sensor)
-    for contracttype in ["afname", "injectie"]:
-        sensors.append(CurrentContractSensorState(hass, entry, contracttype))
-
-    sensors.append(ConstValuesSensor(hass, entry, api))
-
-    # Fetch contract data and initialize SmartEnergyControlSensors
-    try:
-        found_contracts = await api.fetch_data_only(
-            f"energietype={entry.options['energietype']}",
-            f"vast_variabel_dynamisch={entry.options['vast_variabel_dynamisch']}",
-            f"segment={entry.options['segment']}",
-            f"handelsnaam={entry.options['handelsnaam']}",
-            f"productnaam={entry.options['productnaam']}",
-            f"prijsonderdeel={entry.options['prijsonderdeel']}",
+    current_price_sensors = [
+        CurrentContractSensorState(coordinator, entry, contracttype)
+        for contracttype in ["afname", "injectie"]
+    ]
+    sensors.extend(current_price_sensors)
+    window_sensors = [
+        PriceWindowSensor(coordinator, entry, kind, hours)
+        for kind in WINDOW_KINDS
+        for hours in WINDOW_HOURS
+    ]
+    sensors.extend(window_sensors)
+
+    sensors.append(ConstValuesSensor(hass, entry, api, coordinator))
+    sensors.append(ContractComparisonSensor(entry, entry_data.comparison))
+    sensors.extend(
+        ApiDiagnosticSensor(entry, entry_data, kind)
+        for kind in ("requests", "latency", "cache_hit_ratio", "update_duration")
+    )
+
+    # Contracts picked in the options flow are kept in the store
+    for row in existing_sensors.values():
+        sensors.append(
+            SmartEnergyControlSensor(coordinator, entry, row["extra_state_attributes"])
         )
 
-        data = found_contracts[list(found_contracts.keys())[0]]
-
-        # Add existing sensors
-        for row in existing_sensors.get(entry.entry_id, {}).values():
-            sensors.append(
-                SmartEnergyControlSensor(
-                    hass, api, entry, row["extra_state_attributes"]
-                )
-            )
-
-        # Add sensors based on fetched data
-        for row in data.get("prijsonderdelen", []):
-            sensor_id = (
-                f"{DOMAIN}_{row['handelsnaam']}_{row['productnaam']}_{row['prijsonderdeel']}_{row['energietype']}_{row['segment']}_{row['vast_variabel_dynamisch']}_{row['id']}".lower()
-                .replace(" ", "")
-                .replace("(", "")
-                .replace(")", "")
-                .replace("€", "")
-                .replace("/", "")
-                .replace("@", "a")
-                .replace("&", "")
-                .replace("+", "")
-                .lower()
-            )
-
-            sensor = SmartEnergyControlSensor(hass, api, entry, row)
-            if sensor_id not in existing_sensors.get(entry.entry_id, {}):
-                if entry.entry_id not in existing_sensors:
-                    existing_sensors[entry.entry_id] = {}
-
-                existing_sensors[entry.entry_id][sensor_id] = {
-                    "extra_state_attributes": row
-                }
-                await save_sensors_to_file(existing_sensors)
-
-            sensors.append(sensor)
-    except Exception as e:
-        _LOGGER.error(f"Failed to fetch contract data: {e}")
+    # Prices of all tracked contracts are fetched by one coordinator refresh,
+    # started in the background once all platforms are set up
+    for sensor in sensors:
+        if isinstance(sensor, SmartEnergyControlSensor):
+            coordinator.async_track_contract(sensor.unique_id, sensor.data)
 
     # Add all sensors (including the CurrentContractSensor) to Home Assistant
     async_add_entities(sensors)
@@ -124,22 +89,59 @@ async def async_setup_entry(
     # Listen for changes in the selected contract and update the current contract sensor
     async def handle_contract_selection(event):
         """Handle contract selection update."""
+        if event.data.get("entry_id") != entry.entry_id:
+            # Contracts of other entries are tracked by their own coordinator
+            return
         selected_contract_id = event.data.get("selected_contract_id")
         if selected_contract_id:
             # _LOGGER.info(f"Current contract sensor updated to: {selected_contract_id}")
             current_contract_sensor.update_current_sensor(selected_contract_id)
+            for sensor in current_price_sensors + window_sensors:
+                sensor.update_tracked_sensor(selected_contract_id)
 
     # Subscribe to the event that updates the current contract
-    hass.bus.async_listen("current_contract_selected", handle_contract_selection)
+    entry.async_on_unload(
+        hass.bus.async_listen("current_contract_selected", handle_contract_selection)
+    )
+
+    async def async_add_contracts(rows: list[dict]) -> None:
+        """Add sensors for contracts added in the options flow, without a reload."""
+        known = store.async_get_sensors(entry.entry_id)
+        new_sensors = []
+        for row in rows:
+            sensor = SmartEnergyControlSensor(coordinator, entry, row)
+            if sensor.unique_id in known:
+                continue
+            store.async_add_sensor(entry.entry_id, sensor.unique_id, row)
+            coordinator.async_track_contract(sensor.unique_id, row)
+            new_sensors.append(sensor)
+
+        if new_sensors:
+            async_add_entities(new_sensors)
+            await coordinator.async_request_refresh()
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_CONTRACTS_ADDED.format(entry.entry_id), async_add_contracts
+        )
+    )
 
 
 class SmartEnergyControlSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Smart Energy Control sensor."""
 
-    def __init__(self, hass: HomeAssistant, api: MyApi, entry: ConfigEntry, data):
+    # The contract details never change and the price series are available
+    # through the get_price_series service, so only the state is recorded.
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
+    def __init__(
+        self,
+        coordinator: SmartEnergyControlCoordinator,
+        entry: ConfigEntry,
+        data,
+    ):
         """Initialize the sensor."""
-        self._api = api
-        self._hass = hass
+        super().__init__(coordinator)
         self._state = 0
         self._attributes = data
         self.data = data
@@ -170,34 +172,6 @@ class SmartEnergyControlSensor(CoordinatorEntity, SensorEntity):
         )
         self._unique_id = self._name
 
-        # Setting up the DataUpdateCoordinator
-        self.coordinator = DataUpdateCoordinator(
-            hass,
-            _LOGGER,
-            name="SmartEnergyControl Data",
-            update_method=self._fetch_data,
-            update_interval=timedelta(minutes=SENSOR_REFRESH_TIME),
-        )
-
-        hass.async_create_task(self.coordinator.async_config_entry_first_refresh())
-
-        super().__init__(self.coordinator)
-
-    async def _fetch_data(self):
-        """Fetch data from the API with sensor-specific attributes."""
-        data = await self._api.fetch_data_only(
-            f"energietype={self.data['energietype']}",
-            f"vast_variabel_dynamisch={self.data['vast_variabel_dynamisch']}",
-            f"segment={self.data['segment']}",
-            f"handelsnaam={self.data['handelsnaam']}",
-            f"productnaam={self.data['productnaam']}",
-            f"prijsonderdeel={self.data['prijsonderdeel']}",
-            show_prices=True,
-            zip_code=self._entry.data["zip_code"],
-        )
-        data = data[list(data.keys())[0]]
-        return data["prijsonderdelen"][0]
-
     @property
     def unique_id(self):
         """Return a unique ID to use for this entity."""
@@ -218,10 +192,18 @@ class SmartEnergyControlSensor(CoordinatorEntity, SensorEntity):
         """Return extra attributes."""
         return self._attributes
 
+    async def async_added_to_hass(self):
+        """Apply the data of the first coordinator refresh."""
+        await super().async_added_to_hass()
+        self._handle_coordinator_update()
+
     @callback
     def _handle_coordinator_update(self):
         """Handle updated data from the coordinator."""
-        self._attributes = self.coordinator.data
+        data = (self.coordinator.data or {}).get(self.data["id"])
+        if data is None:
+            return
+        self._attributes = data
         self._state = [
             self._attributes.get("prices_afname", {}).get("current_price", 0),
             self._attributes.get("prices_injectie", {}).get("current_price", 0),
@@ -232,6 +214,8 @@ class SmartEnergyControlSensor(CoordinatorEntity, SensorEntity):
 class CurrentContractSensor(SensorEntity):
     """Representation of the Current Contract sensor that listens to another sensor."""
 
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         """Initialize the Current Contract sensor."""
         self._hass = hass
@@ -262,13 +246,12 @@ class CurrentContractSensor(SensorEntity):
     @callback
     def _sensor_state_listener(self, event):
         """Handle state updates of the tracked sensor."""
-        if event.data.get("entity_id") == f"sensor.{self._current_sensor_id}":
-            new_state = event.data.get("new_state")
-            if new_state:
-                self._state = new_state.state
-                self._attributes = new_state.attributes
-                # _LOGGER.info(f"Current contract sensor state updated: {self._state}")
-                self.async_write_ha_state()
+        new_state = event.data.get("new_state")
+        if new_state:
+            self._state = new_state.state
+            self._attributes = new_state.attributes
+            # _LOGGER.info(f"Current contract sensor state updated: {self._state}")
+            self.async_write_ha_state()
 
     @callback
     def update_current_sensor(self, sensor_id):
@@ -290,8 +273,10 @@ class CurrentContractSensor(SensorEntity):
 
         self.async_write_ha_state()
 
-        self._remove_listener = self._hass.bus.async_listen(
-            "state_changed", self._sensor_state_listener
+        self._remove_listener = async_track_state_change_event(
+            self._hass,
+            [f"sensor.{self._current_sensor_id}"],
+            self._sensor_state_listener,
         )
 
     async def async_added_to_hass(self):
@@ -300,15 +285,11 @@ class CurrentContractSensor(SensorEntity):
         if selected_contract:
             self.update_current_sensor(selected_contract)
 
-        if self._current_sensor_id:
-            self._remove_listener = self._hass.bus.async_listen(
-                "state_changed", self._sensor_state_listener
-            )
-
     async def async_will_remove_from_hass(self):
         """Called when the entity is about to be removed."""
         if self._remove_listener:
             self._remove_listener()
+            self._remove_listener = None
 
     async def options_updated(self):
         """Handle updates to the options, such as contract changes."""
@@ -317,23 +298,29 @@ class CurrentContractSensor(SensorEntity):
             self.update_current_sensor(selected_contract)
 
 
-class CurrentContractSensorState(SensorEntity):
-    """Representation of a sensor that mirrors the state of CurrentContractSensor."""
+class CurrentContractSensorState(CoordinatorEntity, SensorEntity):
+    """Current afname or injectie price of the selected contract."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, to_track: str):
-        """Initialize the sensor that mirrors the state of CurrentContractSensor."""
-        self._hass = hass
+    # The unit the recorded statistics of these sensors already have
+    _attr_native_unit_of_measurement = "EUR/kWh"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: SmartEnergyControlCoordinator,
+        entry: ConfigEntry,
+        to_track: str,
+    ):
+        """Initialize the current price sensor."""
+        super().__init__(coordinator)
         self._entry = entry
         self._state = None
-        self._attributes = {
-            "state_class": "measurement",
-            "unit_of_measurement": "EUR/kWh",
-        }
         self._to_track = to_track
         self._name = f"sec_current_contract_sensor_{self._to_track}"
-        self._unique_id = f"{DOMAIN}_current_contract_{self._to_track}"
-        self._remove_listener = None
-        self._tracked_entity_id = "sensor.sec_current_contract_sensor"
+        self._attr_unique_id = (
+            f"{DOMAIN}_{entry.entry_id}_current_contract_{self._to_track}"
+        )
+        self._selected_contract = entry.options.get("selected_contract_id")
 
     @property
     def name(self):
@@ -341,82 +328,26 @@ class CurrentContractSensorState(SensorEntity):
         return self._name
 
     @property
-    def state(self):
-        """Return the current state of the sensor."""
+    def native_value(self):
+        """Return the current price of the selected contract."""
         return self._state
 
-    @property
-    def extra_state_attributes(self):
-        """Return the attributes of the sensor."""
-        return self._attributes
-
-    @callback
-    def _sensor_state_listener(self, event):
-        """Handle state updates from the tracked sensor."""
-        entity_id = event.data.get("entity_id")
-        if entity_id != self._tracked_entity_id:
-            return
-
-        new_state = event.data.get("new_state")
-        if new_state:
-            try:
-                state_values = eval(new_state.state)
-                if isinstance(state_values, (list, tuple)) and len(state_values) == 2:
-                    if self._to_track == "afname":
-                        self._state = state_values[0]
-                    elif self._to_track == "injectie":
-                        self._state = state_values[1]
-                    else:
-                        _LOGGER.error(f"Invalid tracking option: {self._to_track}")
-
-                    self.async_write_ha_state()
-
-            except (SyntaxError, TypeError) as e:
-                _LOGGER.error(
-                    f"Error evaluating state of {self._tracked_entity_id}: {e}"
-                )
-
     async def async_added_to_hass(self):
         """Called when the sensor is added to Home Assistant."""
-        state = self._hass.states.get(self._tracked_entity_id)
-        if state:
-            try:
-                if state.state and state.state not in ("unknown", "unavailable"):
-                    state_values = eval(state.state)
-                    if (
-                        isinstance(state_values, (list, tuple))
-                        and len(state_values) == 2
-                    ):
-                        if self._to_track == "afname":
-                            self._state = state_values[0]
-                        elif self._to_track == "injectie":
-                            self._state = state_values[1]
-                        else:
-                            _LOGGER.error(f"Invalid tracking option: {self._to_track}")
-                    else:
-                        _LOGGER.error(
-                            "Tracked sensor state is not a valid list or tuple with two elements"
-                        )
-                else:
-                    _LOGGER.warning(
-                        f"State of tracked sensor {self._tracked_entity_id} is {state.state}"
-                    )
-            except (SyntaxError, TypeError) as e:
-                _LOGGER.error(
-                    f"Error evaluating state of {self._tracked_entity_id}: {e}"
-                )
+        await super().async_added_to_hass()
+        self._handle_coordinator_update()
 
+    @callback
+    def _handle_coordinator_update(self):
+        """Read the current price of the selected contract from the coordinator."""
+        contract_id = self.coordinator.contract_id(self._selected_contract)
+        data = (self.coordinator.data or {}).get(contract_id)
+        if data is None:
+            self._state = None
+        else:
+            self._state = data.get(f"prices_{self._to_track}", {}).get("current_price")
         self.async_write_ha_state()
 
-        self._remove_listener = self._hass.bus.async_listen(
-            "state_changed", self._sensor_state_listener
-        )
-
-    async def async_will_remove_from_hass(self):
-        """Called when the entity is about to be removed."""
-        if self._remove_listener:
-            self._remove_listener()
-
     async def options_updated(self):
         """Handle updates to the options when the contract changes."""
         selected_contract = self._entry.options.get("selected_contract_id")
@@ -426,42 +357,83 @@ class CurrentContractSensorState(SensorEntity):
     @callback
     def update_tracked_sensor(self, sensor_id):
         """Update the sensor to track the new contract."""
-        self._tracked_entity_id = f"sensor.{sensor_id}"
+        self._selected_contract = sensor_id
+        self._handle_coordinator_update()
+
+
+class PriceWindowSensor(CoordinatorEntity, SensorEntity):
+    """Next cheapest or most expensive afname window of the selected contract."""
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _unrecorded_attributes = frozenset({"windows"})
+
+    def __init__(
+        self,
+        coordinator: SmartEnergyControlCoordinator,
+        entry: ConfigEntry,
+        kind: str,
+        hours: float,
+    ):
+        """Initialize the window sensor."""
+        super().__init__(coordinator)
+        self._kind = kind
+        self._hours = hours
+        self._attr_name = f"sec_{kind}_window_{hours}h"
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_{kind}_window_{hours}h"
+        self._selected_contract = entry.options.get("selected_contract_id")
 
-        state = self._hass.states.get(self._tracked_entity_id)
-        if state:
-            try:
-                state_values = eval(state.state)
-                if isinstance(state_values, (list, tuple)) and len(state_values) == 2:
-                    if self._to_track == "afname":
-                        self._state = state_values[0]
-                    elif self._to_track == "injectie":
-                        self._state = state_values[1]
-                    else:
-                        _LOGGER.error(f"Invalid tracking option: {self._to_track}")
-            except (SyntaxError, TypeError) as e:
-                _LOGGER.error(
-                    f"Error evaluating state of {self._tracked_entity_id}: {e}"
-                )
+    async def async_added_to_hass(self):
+        """Called when the sensor is added to Home Assistant."""
+        await super().async_added_to_hass()
+        self._handle_coordinator_update()
 
+    @callback
+    def _handle_coordinator_update(self):
+        """Show the first window that has not ended yet.
+
+        The windows are planned once per price refresh, every update only
+        drops the windows that have passed.
+        """
+        contract_id = self.coordinator.contract_id(self._selected_contract)
+        windows = self.coordinator.price_windows(
+            contract_id, "afname", self._kind, self._hours
+        )
+        if not windows:
+            self._attr_native_value = None
+            self._attr_extra_state_attributes = {}
+        else:
+            now = dt_util.now()
+            self._attr_native_value = windows[0].start
+            self._attr_extra_state_attributes = {
+                "end": windows[0].end,
+                "average_price": windows[0].average_price,
+                "active": windows[0].start <= now,
+                "windows": [window.as_dict() for window in windows],
+            }
         self.async_write_ha_state()
 
-        if self._remove_listener:
-            self._remove_listener()
-
-        self._remove_listener = self._hass.bus.async_listen(
-            "state_changed", self._sensor_state_listener
-        )
+    @callback
+    def update_tracked_sensor(self, sensor_id):
+        """Update the sensor to plan for the new contract."""
+        self._selected_contract = sensor_id
+        self._handle_coordinator_update()
 
 
 class ConstValuesSensor(SensorEntity):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: MyApi) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api: MyApi,
+        coordinator: SmartEnergyControlCoordinator,
+    ) -> None:
         self._name = "sec_constant_values"
         self._state = 0
         self._hass = hass
         self._unique_id = f"{DOMAIN}_constant_values"
         self._entry = entry
         self._api = api
+        self._coordinator = coordinator
         self._attributes = {}
 
     @property
@@ -486,10 +458,125 @@ class ConstValuesSensor(SensorEntity):
 
     async def async_added_to_hass(self):
         """When entity is added to hass."""
-        await self._update_constants()
+        # Stored constants are only fetched again once outdated
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self._update_constants, timedelta(hours=1)
+            )
+        )
+        # Show the stored constants now, a refresh may retry for minutes
+        self._async_apply_constants(await async_get_constants_cache(self.hass))
+        self._entry.async_create_background_task(
+            self.hass, self._update_constants(), f"{DOMAIN} constants refresh"
+        )
 
-    async def _update_constants(self):
-        """Fetch constants from the API and update attributes."""
+    async def _update_constants(self, now=None):
+        """Refresh the constants when outdated and update attributes."""
+        cache = await async_get_constants_cache(self.hass)
+        await cache.async_refresh(self._api, self._entry.data.get("zip_code"))
+        self._async_apply_constants(cache)
+
+    @callback
+    def _async_apply_constants(self, cache: ConstantsCache) -> None:
+        """Show the cached constants and pass their tariffs on."""
         zip_code = self._entry.data.get("zip_code")
-        self._attributes = await self._api.get_constants(zip_code)
+        self._attributes = cache.async_get_constants(zip_code) or {}
         self.async_write_ha_state()
+        self._coordinator.async_set_tariffs(cache.async_get_tariffs(zip_code))
+
+
+class ContractComparisonSensor(SensorEntity):
+    """Cheapest tracked contract for the consumption recorded this month."""
+
+    _attr_should_poll = False
+
+    def __init__(self, entry: ConfigEntry, comparison: ContractComparison) -> None:
+        """Initialize the comparison sensor."""
+        self._comparison = comparison
+        self._name = "sec_contract_comparison"
+        self._unique_id = f"{DOMAIN}_{entry.entry_id}_contract_comparison"
+
+    @property
+    def unique_id(self):
+        """Return unique id."""
+        return self._unique_id
+
+    @property
+    def name(self):
+        """Return name."""
+        return self._name
+
+    @property
+    def state(self):
+        """Return the cheapest contract of this month."""
+        return self._comparison.cheapest(dt_util.now().strftime("%Y-%m"))
+
+    @property
+    def extra_state_attributes(self):
+        """Return the cost per contract today and this month."""
+        now = dt_util.now()
+        return {
+            "today": self._comparison.daily.get(now.date().isoformat(), {}),
+            "month": self._comparison.monthly.get(now.strftime("%Y-%m"), {}),
+            "month_hours": self._comparison.monthly_hours.get(
+                now.strftime("%Y-%m"), {}
+            ),
+            "last_processed_hour": self._comparison.last_hour,
+        }
+
+    async def async_added_to_hass(self):
+        """Update when new hours have been processed."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._comparison.signal, self.async_write_ha_state
+            )
+        )
+
+
+class ApiDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Cost of talking to the API, disabled unless enabled by the user."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
+    def __init__(
+        self, entry: ConfigEntry, entry_data: SmartEnergyControlData, kind: str
+    ) -> None:
+        """Initialize the diagnostic sensor."""
+        super().__init__(entry_data.coordinator)
+        self._api = entry_data.api
+        self._kind = kind
+        self._attr_name = f"sec_api_{kind}"
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_diagnostics_{kind}"
+        if kind == "requests":
+            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        elif kind == "cache_hit_ratio":
+            self._attr_native_unit_of_measurement = PERCENTAGE
+        else:
+            self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    @property
+    def native_value(self):
+        """Return the current value of the metric."""
+        metrics = self._api.metrics
+        if self._kind == "requests":
+            return metrics.requests
+        if self._kind == "latency":
+            average = metrics.endpoint("data").latency.average
+            return round(average, 1) if average is not None else None
+        if self._kind == "cache_hit_ratio":
+            ratio = metrics.cache("conditional").hit_ratio
+            return round(ratio * 100, 1) if ratio is not None else None
+        average = self.coordinator.update_durations.average
+        return round(average, 1) if average is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the details behind the metric."""
+        metrics = self._api.metrics.as_dict()
+        if self._kind == "cache_hit_ratio":
+            return metrics["caches"]
+        if self._kind == "update_duration":
+            return self.coordinator.diagnostics()
+        return metrics["endpoints"]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .const import DIRECTIONS, DOMAIN, WINDOW_COUNT
+from .coordinator import SmartEnergyControlCoordinator
+from .planner import CHEAPEST, WINDOW_KINDS
+from .timeseries import PriceSeries
+
+SERVICE_GET_PRICE_SERIES = "get_price_series"
+SERVICE_GET_PRICE_WINDOWS = "get_price_windows"
+
+GET_PRICE_SERIES_SCHEMA = vol.Schema({vol.Required(ATTR_ENTITY_ID): cv.entity_id})
+GET_PRICE_WINDOWS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Optional("hours", default=1): vol.All(
+            vol.Coerce(float), vol.Range(min=0.5, max=24)
+        ),
+        vol.Optional("count", default=WINDOW_COUNT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=24)
+        ),
+        vol.Optional("kind", default=CHEAPEST): vol.In(WINDOW_KINDS),
+        vol.Optional("direction", default="afname"): vol.In(DIRECTIONS),
+    }
+)
+
+
+def _series_response(series: PriceSeries | None) -> dict | None:
+    """Return today's and tomorrow's slots of a series."""
+    if series is None:
+        return None
+    return {
+        "today": series.as_list(series.today),
+        "tomorrow": series.as_list(series.tomorrow),
+    }
+
+
+@callback
+def _async_get_contract(
+    hass: HomeAssistant, entity_id: str
+) -> tuple[SmartEnergyControlCoordinator, int]:
+    """Return the coordinator and contract id behind a contract sensor."""
+    entity_entry = er.async_get(hass).async_get(entity_id)
+    if entity_entry is None or entity_entry.platform != DOMAIN:
+        raise ServiceValidationError(f"{entity_id} is not a contract sensor")
+
+    for entry_data in hass.data.get(DOMAIN, {}).values():
+        coordinator = entry_data.coordinator
+        contract_id = coordinator.contract_id(entity_entry.unique_id)
+        if contract_id is not None:
+            return coordinator, contract_id
+    raise ServiceValidationError(f"{entity_id} is not a contract sensor")
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_get_price_series(call: ServiceCall) -> ServiceResponse:
+        """Return the full energy and all-in price series of a contract sensor."""
+        coordinator, contract_id = _async_get_contract(hass, call.data[ATTR_ENTITY_ID])
+        series = coordinator.series.get(contract_id, {})
+        all_in = coordinator.all_in.get(contract_id, {})
+        start = next(iter(all_in.values()), None)
+        return {
+            "start": start.start.isoformat() if start else None,
+            "interval": start.interval if start else None,
+            **{
+                direction: {
+                    "energy": _series_response(series.get(direction)),
+                    "all_in": _series_response(all_in.get(direction)),
+                }
+                for direction in DIRECTIONS
+            },
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PRICE_SERIES,
+        async_get_price_series,
+        schema=GET_PRICE_SERIES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_get_price_windows(call: ServiceCall) -> ServiceResponse:
+        """Return the cheapest or most expensive windows of a contract sensor."""
+        coordinator, contract_id = _async_get_contract(hass, call.data[ATTR_ENTITY_ID])
+        windows = coordinator.price_windows(
+            contract_id,
+            call.data["direction"],
+            call.data["kind"],
+            call.data["hours"],
+            call.data["count"],
+        )
+        return {"windows": [window.as_dict() for window in windows]}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PRICE_WINDOWS,
+        async_get_price_windows,
+        schema=GET_PRICE_WINDOWS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
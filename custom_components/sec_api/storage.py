@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    SENSOR_SAVE_DELAY,
+    SENSOR_STORAGE_KEY,
+    SENSOR_STORAGE_VERSION,
+    SENSORS_PATH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _load_legacy_sensors() -> dict:
+    """Load sensors from the JSON file that used to live in the component folder."""
+    if not os.path.exists(SENSORS_PATH):
+        return {}
+    with open(SENSORS_PATH) as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            _LOGGER.error("Failed to decode JSON file, returning empty dictionary")
+            return {}
+
+
+class SensorStore:
+    """Tracked contract sensors of all config entries, kept in .storage."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._hass = hass
+        self._store: Store[dict] = Store(
+            hass, SENSOR_STORAGE_VERSION, SENSOR_STORAGE_KEY, atomic_writes=True
+        )
+        self._data: dict[str, dict[str, dict]] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored sensors, migrating the legacy JSON file once."""
+        data = await self._store.async_load()
+        if data is not None:
+            self._data = data
+            return
+
+        self._data = await self._hass.async_add_executor_job(_load_legacy_sensors)
+        if self._data:
+            _LOGGER.info("Migrating %s to Home Assistant storage", SENSORS_PATH)
+            self._async_schedule_save()
+
+    @callback
+    def async_get_sensors(self, entry_id: str) -> dict[str, dict]:
+        """Return the stored sensors of a config entry keyed by sensor id."""
+        return self._data.get(entry_id, {})
+
+    @callback
+    def async_add_sensor(self, entry_id: str, sensor_id: str, row: dict) -> None:
+        """Store a sensor, a no-op when it is already known."""
+        sensors = self._data.setdefault(entry_id, {})
+        if sensor_id in sensors:
+            return
+        sensors[sensor_id] = {"extra_state_attributes": row}
+        self._async_schedule_save()
+
+    @callback
+    def async_remove_sensor(self, entry_id: str, sensor_id: str) -> dict | None:
+        """Remove a sensor and return its stored data."""
+        removed = self._data.get(entry_id, {}).pop(sensor_id, None)
+        if removed is not None:
+            self._async_schedule_save()
+        return removed
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        """Forget all sensors of a removed config entry."""
+        if self._data.pop(entry_id, None) is not None:
+            self._async_schedule_save()
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Coalesce changes into one delayed write."""
+        self._store.async_delay_save(lambda: self._data, SENSOR_SAVE_DELAY)
+
+
+@singleton(f"{DOMAIN}_{SENSOR_STORAGE_KEY}")
+async def async_get_sensor_store(hass: HomeAssistant) -> SensorStore:
+    """Return the shared sensor store, loading it on first use."""
+    store = SensorStore(hass)
+    await store.async_load()
+    return store
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from homeassistant.util import dt as dt_util
+
+from .const import PRICE_INTERVAL
+
+# Keys identifying a single price point in list based payloads.
+TIME_KEYS = ("start", "time", "timestamp", "datetime", "from")
+PRICE_KEYS = ("price", "value", "prijs")
+
+
+def _parse_time(value) -> datetime | None:
+    """Parse a timestamp, treating naive values as local time."""
+    if not isinstance(value, str):
+        return None
+    try:
+        when = dt_util.parse_datetime(value)
+    except ValueError:
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return when
+
+
+def _slot_count(start: datetime, end: datetime, interval: int) -> int:
+    """Return the number of slots of interval minutes between two moments."""
+    return int((end.timestamp() - start.timestamp()) // (interval * 60))
+
+
+def _is_number(value) -> bool:
+    """Return whether a JSON value is a number."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _iter_points(block) -> Iterator[tuple[datetime, float]]:
+    """Yield the (timestamp, price) points found in a prices_* block.
+
+    Both {timestamp: price} mappings and lists of {"start": ..., "price": ...}
+    objects are recognised, at any nesting depth (e.g. under today/tomorrow).
+    """
+    if isinstance(block, list):
+        for item in block:
+            yield from _iter_points(item)
+        return
+    if not isinstance(block, dict):
+        return
+
+    when = next((_parse_time(block[key]) for key in TIME_KEYS if key in block), None)
+    price = next((block[key] for key in PRICE_KEYS if _is_number(block.get(key))), None)
+    if when is not None and price is not None:
+        yield when, float(price)
+        return
+
+    for key, value in block.items():
+        if _is_number(value):
+            if (when := _parse_time(key)) is not None:
+                yield when, float(value)
+        elif isinstance(value, (dict, list)):
+            yield from _iter_points(value)
+
+
+class PriceSeries:
+    """Prices of today and tomorrow stored as one contiguous array of slots.
+
+    Slot i covers [start + i * interval, start + (i + 1) * interval), counted
+    in absolute time so DST days simply have more or fewer slots. Missing
+    slots hold NaN.
+    """
+
+    __slots__ = ("start", "interval", "values", "_split")
+
+    def __init__(self, start: datetime, interval: int, values: np.ndarray) -> None:
+        """Initialize the series."""
+        self.start = start
+        self.interval = interval
+        self.values = values
+        tomorrow = dt_util.start_of_local_day(start.date() + timedelta(days=1))
+        self._split = _slot_count(start, tomorrow, interval)
+
+    @classmethod
+    def empty(cls, start: datetime, interval: int = PRICE_INTERVAL) -> PriceSeries:
+        """Return a series of today and tomorrow without known prices."""
+        end = dt_util.start_of_local_day(start.date() + timedelta(days=2))
+        return cls(start, interval, np.full(_slot_count(start, end, interval), np.nan))
+
+    @classmethod
+    def from_prices(
+        cls, prices: dict, start: datetime, interval: int = PRICE_INTERVAL
+    ) -> PriceSeries:
+        """Build the series of today and tomorrow from a prices_* block."""
+        series = cls.empty(start, interval)
+        for when, price in _iter_points(prices):
+            if (index := series.index(when)) is not None:
+                series.values[index] = price
+        return series
+
+    def index(self, when: datetime) -> int | None:
+        """Return the slot covering a moment, None when outside the series."""
+        index = int((when.timestamp() - self.start.timestamp()) // (self.interval * 60))
+        if 0 <= index < len(self.values):
+            return index
+        return None
+
+    def slot_start(self, index: int) -> datetime:
+        """Return the start of a slot."""
+        return dt_util.as_local(
+            dt_util.as_utc(self.start) + timedelta(minutes=self.interval * index)
+        )
+
+    def price_at(self, when: datetime) -> float | None:
+        """Return the price at a moment in O(1)."""
+        index = self.index(when)
+        if index is None or np.isnan(self.values[index]):
+            return None
+        return float(self.values[index])
+
+    @property
+    def today(self) -> np.ndarray:
+        """Return the slots of today."""
+        return self.values[: self._split]
+
+    @property
+    def tomorrow(self) -> np.ndarray:
+        """Return the slots of tomorrow."""
+        return self.values[self._split :]
+
+    @property
+    def is_empty(self) -> bool:
+        """Return whether no slot has a known price."""
+        return bool(np.isnan(self.values).all())
+
+    @property
+    def has_tomorrow(self) -> bool:
+        """Return whether tomorrow's prices are known."""
+        return bool(np.any(~np.isnan(self.tomorrow)))
+
+    @staticmethod
+    def stats(values: np.ndarray) -> dict[str, float | None]:
+        """Return min, max and mean of a slice, ignoring missing slots."""
+        known = values[~np.isnan(values)]
+        if not known.size:
+            return {"min_price": None, "max_price": None, "average_price": None}
+        return {
+            "min_price": float(known.min()),
+            "max_price": float(known.max()),
+            "average_price": float(known.mean()),
+        }
+
+    @staticmethod
+    def as_list(values: np.ndarray) -> list[float | None]:
+        """Return a slice as a JSON friendly list."""
+        return [None if np.isnan(value) else float(value) for value in values]
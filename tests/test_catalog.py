@@ -0,0 +1,92 @@
+"""Tests for the streamed contract catalog index."""
+
+import asyncio
+import json
+
+from custom_components.sec_api.catalog import CatalogIndex
+
+CATALOG = {
+    "data": {
+        "Eneco N.V.": {
+            "name": "Eneco N.V.",
+            "prijsonderdelen": [
+                {
+                    "id": 1,
+                    "energietype": "Elektriciteit",
+                    "vast_variabel_dynamisch": "Dynamisch",
+                    "segment": "Woning",
+                    "handelsnaam": "Eneco N.V.",
+                    "productnaam": "Dynamic",
+                    "prijsonderdeel": "Dag",
+                    "prices_afname": {"current_price": 0.1, "today": {"name": "x"}},
+                },
+                {
+                    "id": 2,
+                    "energietype": "Elektriciteit",
+                    "vast_variabel_dynamisch": "Dynamisch",
+                    "segment": "Woning",
+                    "handelsnaam": "Eneco N.V.",
+                    "productnaam": "Dynamic",
+                    "prijsonderdeel": "Nacht",
+                },
+                # No prijsonderdeel, not indexed
+                {
+                    "id": 3,
+                    "energietype": "Elektriciteit",
+                    "vast_variabel_dynamisch": "Dynamisch",
+                    "segment": "Woning",
+                    "handelsnaam": "Eneco N.V.",
+                    "productnaam": "Incomplete",
+                },
+            ],
+        },
+        "2": {
+            "name": "Luminus",
+            "prijsonderdelen": [
+                {
+                    "id": 4,
+                    "energietype": "Gas",
+                    "vast_variabel_dynamisch": "Vast",
+                    "segment": "Woning",
+                    "handelsnaam": "Luminus",
+                    "productnaam": "ComfyFix",
+                    "prijsonderdeel": "Enkelvoudig",
+                }
+            ],
+        },
+    }
+}
+
+
+class _Stream:
+    """Response body read in small chunks."""
+
+    def __init__(self, body: bytes, chunk_size: int = 16) -> None:
+        self._body = body
+        self._chunk_size = chunk_size
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk_size = self._chunk_size if size < 0 else min(size, self._chunk_size)
+        chunk, self._body = self._body[:chunk_size], self._body[chunk_size:]
+        return chunk
+
+
+def test_async_from_stream() -> None:
+    """Test the index is built from a streamed catalog."""
+    body = json.dumps(CATALOG).encode()
+    index = asyncio.run(CatalogIndex.async_from_stream(_Stream(body)))
+
+    electricity = ("Elektriciteit", "Dynamisch", "Woning")
+    gas = ("Gas", "Vast", "Woning")
+    assert index.names == ["Eneco N.V.", "Luminus"]
+    assert index.suppliers(*electricity) == ["Eneco N.V."]
+    assert index.suppliers(*gas) == ["Luminus"]
+    assert index.suppliers("Gas", "Dynamisch", "Woning") == []
+    assert index.products(*electricity, "Eneco N.V.") == ["Dynamic"]
+    assert index.products(*gas, "Luminus") == ["ComfyFix"]
+    assert index.price_components(*electricity, "Eneco N.V.", "Dynamic") == [
+        "Dag",
+        "Nacht",
+    ]
+    assert index.price_components(*electricity, "Eneco N.V.", "Incomplete") == []
+    assert index.price_components(*gas, "Luminus", "ComfyFix") == ["Enkelvoudig"]
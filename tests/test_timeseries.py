@@ -0,0 +1,56 @@
+"""Tests for the price series on the DST transition days."""
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.sec_api.timeseries import PriceSeries
+
+BRUSSELS = dt_util.get_time_zone("Europe/Brussels")
+
+
+@pytest.fixture(autouse=True)
+def time_zone():
+    """Run every test in the Europe/Brussels time zone."""
+    default = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(BRUSSELS)
+    yield
+    dt_util.set_default_time_zone(default)
+
+
+@pytest.mark.parametrize(
+    ("day", "today_slots", "noon_index"),
+    [
+        # 23 hour day, 02:00 does not exist
+        (date(2026, 3, 29), 46, 22),
+        # 25 hour day, 02:00 happens twice
+        (date(2026, 10, 25), 50, 26),
+    ],
+)
+def test_dst_day(day: date, today_slots: int, noon_index: int) -> None:
+    """Test slots are counted in absolute time on DST days."""
+    start = dt_util.start_of_local_day(day)
+    prices = {}
+    when = dt_util.as_utc(start)
+    for index in range(today_slots + 48):
+        # API timestamps carry a fixed offset
+        prices[when.isoformat()] = float(index)
+        when += timedelta(minutes=30)
+
+    series = PriceSeries.from_prices(prices, start)
+
+    assert len(series.today) == today_slots
+    assert len(series.tomorrow) == 48
+    assert not np.isnan(series.values).any()
+
+    noon = datetime.combine(day, datetime.min.time().replace(hour=12), BRUSSELS)
+    assert series.index(noon) == noon_index
+    assert series.price_at(noon) == noon_index
+    assert series.slot_start(noon_index) == noon
+    assert series.slot_start(noon_index).utcoffset() == noon.utcoffset()
+    assert series.slot_start(today_slots) == dt_util.start_of_local_day(
+        day + timedelta(days=1)
+    )